@@ -0,0 +1,48 @@
+"""Benchmarks a stub whose calls mostly match a few entries at the end of a large configuration.
+
+Each entry matches a ticker and any date, so every entry uses a matcher. The stub is run with and without
+adaptive=True, which compares the most hit entries first when no earlier entry can overlap them.
+
+Usage: python -m benchmarks.bench_adaptive [--entries 6,1000,20000] [--calls N] [--hot N]
+"""
+from __future__ import print_function, division
+import argparse
+from datetime import date
+import time
+try:
+    from unittest.mock import call
+except ImportError:
+    from mock import call
+
+from mockextras import stub, Any
+
+
+def run(entries, calls, hot, adaptive):
+    fn = stub(*[(call('T%d' % i, Any(date)), i) for i in range(entries)], adaptive=adaptive)
+    tickers = ['T%d' % (entries - 1 - i) for i in range(min(hot, entries))]
+    day = date(2015, 1, 2)
+    # warm up, so the one off cost of promoting the entries isn't included
+    for i in range(100):
+        fn(tickers[i % len(tickers)], day)
+    start = time.time()
+    for i in range(calls):
+        fn(tickers[i % len(tickers)], day)
+    return time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', default='6,1000,20000', help='comma separated stub sizes')
+    parser.add_argument('--calls', type=int, default=50000, help='calls per run')
+    parser.add_argument('--hot', type=int, default=3, help='number of entries called, from the last one back')
+    args = parser.parse_args(argv)
+
+    print('%8s %14s %14s %8s' % ('entries', 'scan (us)', 'adaptive (us)', 'speedup'))
+    for entries in [int(n) for n in args.entries.split(',')]:
+        scan = run(entries, args.calls, args.hot, False) / args.calls
+        adaptive = run(entries, args.calls, args.hot, True) / args.calls
+        print('%8d %14.2f %14.2f %7.1fx' % (entries, scan * 1e6, adaptive * 1e6, scan / adaptive))
+
+
+if __name__ == '__main__':
+    main()
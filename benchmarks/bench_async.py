@@ -0,0 +1,74 @@
+"""Benchmarks async stubs awaited from many concurrent tasks.
+
+Every task awaits an AsyncMock configured with when(), once with plain results and once with coroutine function
+results that yield to the event loop before resolving, and a stand-alone async_stub() for comparison.
+
+Usage: python -m benchmarks.bench_async [--tasks 1000,10000,100000] [--entries N]
+"""
+from __future__ import print_function, division
+import argparse
+import asyncio
+import sys
+import time
+from unittest.mock import AsyncMock, call
+
+from mockextras import async_stub, when
+
+
+def _later(value):
+    async def factory():
+        await asyncio.sleep(0)
+        return value
+    return factory
+
+
+def make_when(entries, tasks, deferred):
+    """An AsyncMock with literal entries and a then() sequence with a result for every task."""
+    mock_fn = AsyncMock()
+    for i in range(entries):
+        when(mock_fn).called_with(i).then(_later(i) if deferred else i)
+    called_with = when(mock_fn).called_with('seq')
+    for i in range(tasks):
+        called_with.then(_later(i) if deferred else i)
+    return mock_fn
+
+
+def make_async_stub(entries, tasks, deferred):
+    """The same configuration as make_when, as a stand-alone async stub."""
+    results = [_later(i) if deferred else i for i in range(tasks)]
+    return async_stub(*([(call(i), results[i % tasks]) for i in range(entries)] +
+                        [(call('seq'),) + tuple(results)]))
+
+
+def run(fn, tasks, entries):
+    async def task(t):
+        await fn(t % entries)
+        await fn('seq')
+
+    async def main():
+        await asyncio.gather(*[task(t) for t in range(tasks)])
+
+    start = time.time()
+    asyncio.run(main())
+    return time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', default='1000,10000,100000', help='comma separated concurrent task counts')
+    parser.add_argument('--entries', type=int, default=1000, help='literal entries in the stub')
+    args = parser.parse_args(argv)
+
+    print('Python %s' % sys.version.split()[0])
+    for tasks in [int(t) for t in args.tasks.split(',')]:
+        for name, factory in (('when(AsyncMock)', make_when), ('async_stub', make_async_stub)):
+            for deferred in (False, True):
+                fn = factory(args.entries, tasks, deferred)
+                seconds = run(fn, tasks, args.entries)
+                print('tasks=%-7d %-16s deferred=%-5s %10.0f awaits/s' % (tasks, name, deferred,
+                                                                          2 * tasks / seconds))
+                sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Benchmarks the per-test setup cost of the fluent API.
+
+Each "test" creates a fresh mock and configures it with when().called_with().then(). The legacy implementation,
+which built new classes on every call to when(), is reproduced here so the two can be compared side by side.
+
+Usage: python -m benchmarks.bench_fluent_setup [--tests N] [--entries N] [--repeat N]
+"""
+from __future__ import print_function
+import argparse
+import timeit
+try:
+    from unittest.mock import Mock, call, _is_exception, _is_instance_mock
+except ImportError:
+    from mock import Mock, call, _is_exception, _is_instance_mock
+
+from mockextras import when
+from mockextras._stub import _Sequence, _Stub
+
+
+def legacy_when(mock_fn):
+    class ListSeq(_Sequence):
+        def __init__(self):  #pylint: disable=super-init-not-called
+            self.list = []
+
+        def __call__(self):
+            retval = self.list.pop(0) if len(self.list) > 1 else self.list[0]
+            if _is_exception(retval):
+                raise retval
+            return retval
+
+    class When(object):
+        def __init__(self, mock_fn):
+            self._mock_fn = mock_fn
+            if not _is_instance_mock(self._mock_fn):
+                raise RuntimeError("mock_fn must be an instance of Mock")
+            if not isinstance(self._mock_fn.side_effect, _Stub):
+                self._mock_fn.side_effect = _Stub()
+
+        def called_with(self, *args, **kwargs):
+            return CalledWith(self._mock_fn.side_effect._results, call(*args, **kwargs))  #pylint: disable=protected-access
+
+    class CalledWith(object):
+        def __init__(self, results, key):
+            self._results = results
+            self._key = key
+            self._list = None
+
+        def then(self, obj):
+            if self._list is None:
+                s = ListSeq()
+                self._results.append((self._key, s))
+                self._list = s.list
+            self._list.append(obj)
+            return self
+
+    return When(mock_fn)
+
+
+def setup_tests(when_fn, tests, entries):
+    for _ in range(tests):
+        mock_fn = Mock()
+        for i in range(entries):
+            when_fn(mock_fn).called_with(i).then(i).then(-i)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tests', type=int, default=1000, help='number of simulated tests')
+    parser.add_argument('--entries', type=int, default=10, help='when() calls per test')
+    parser.add_argument('--repeat', type=int, default=5, help='best of this many runs is reported')
+    args = parser.parse_args(argv)
+
+    timings = {}
+    for name, when_fn in (('legacy', legacy_when), ('current', when)):
+        timings[name] = min(timeit.repeat(lambda: setup_tests(when_fn, args.tests, args.entries),
+                                          number=1, repeat=args.repeat))
+        print('%-8s %8.1f us per test' % (name, timings[name] / args.tests * 1e6))
+    print('speedup  %8.2fx' % (timings['legacy'] / timings['current']))
+
+
+if __name__ == '__main__':
+    main()
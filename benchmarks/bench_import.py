@@ -0,0 +1,59 @@
+"""Benchmarks the import time of mockextras, as reported by python -X importtime.
+
+Each case is run in a fresh interpreter several times and the best cumulative time of the mockextras imports is
+reported. Pass --max-ms to fail when importing mockextras itself takes longer, e.g. in CI.
+
+Usage: python -m benchmarks.bench_import [--repeat N] [--max-ms MS]
+"""
+from __future__ import print_function, division
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+
+CASES = [
+    ('import mockextras', 'import mockextras'),
+    ('first use of stub', 'import mockextras; mockextras.stub'),
+    ('import everything', 'from mockextras import *'),
+]
+
+_LINE = re.compile(r'import time:\s*(\d+) \|\s*(\d+) \|(\s*)(\S+)')
+
+
+def import_time(statement):
+    """Returns the cumulative microseconds spent importing mockextras and its modules when running statement."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    output = subprocess.check_output([sys.executable, '-X', 'importtime', '-c', statement],
+                                     stderr=subprocess.STDOUT, env=env, cwd=root).decode('utf-8')
+    total = 0
+    for self_us, cumulative_us, indent, name in _LINE.findall(output):
+        # only top level imports, whose cumulative time includes everything they imported
+        if name == 'mockextras' or (name.startswith('mockextras.') and len(indent) == 1):
+            total += int(cumulative_us)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='interpreters started per case')
+    parser.add_argument('--max-ms', type=float, help='fail if import mockextras takes longer than this')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, statement in CASES:
+        best = min(import_time(statement) for _ in range(args.repeat))
+        results[name] = best
+        print('%-20s %10.2f ms' % (name, best / 1000.0))
+        sys.stdout.flush()
+
+    if args.max_ms is not None and results['import mockextras'] > args.max_ms * 1000:
+        print('REGRESSION: import mockextras took more than %g ms' % args.max_ms)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Benchmarks the throughput of a stub called from many threads.
+
+Each thread calls a stub with a mix of indexed literal entries, matcher entries and then() sequences. The stub is
+run with and without thread_safe=True. On a free-threaded CPython build (3.13t and later, with the GIL disabled)
+the threads run in parallel, so this also shows how much the thread safe mode contends.
+
+Usage: python -m benchmarks.bench_threads [--threads 1,2,4,8] [--calls N] [--entries N]
+"""
+from __future__ import print_function, division
+import argparse
+import sys
+import threading
+import time
+try:
+    from unittest.mock import Mock, call
+except ImportError:
+    from mock import Mock, call
+
+from mockextras import stub, when, Any
+
+
+def make_stub(entries, threads, calls, thread_safe):
+    """A stub with literal entries, a matcher entry and one then() sequence long enough for each thread."""
+    mock_fn = Mock()
+    mock_fn.side_effect = stub(*([(call(i), i) for i in range(entries)] +
+                                 [(call(Any(str)), 'string')]),
+                               thread_safe=thread_safe)
+    for t in range(threads):
+        called_with = when(mock_fn).called_with('seq', t)
+        for i in range(calls):
+            called_with.then(i)
+    return mock_fn.side_effect
+
+
+def run(fn, threads, calls, entries):
+    barrier = threading.Barrier(threads) if hasattr(threading, 'Barrier') else None
+
+    def worker(t):
+        if barrier is not None:
+            barrier.wait()
+        for i in range(calls):
+            fn(i % entries)
+            fn('hello')
+            fn('seq', t)
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.time()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', default='1,2,4,8', help='comma separated thread counts')
+    parser.add_argument('--calls', type=int, default=20000, help='iterations per thread, three calls each')
+    parser.add_argument('--entries', type=int, default=1000, help='literal entries in the stub')
+    args = parser.parse_args(argv)
+
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print('Python %s, GIL %s' % (sys.version.split()[0], 'enabled' if gil else 'disabled'))
+    for threads in [int(t) for t in args.threads.split(',')]:
+        for thread_safe in (False, True):
+            fn = make_stub(args.entries, threads, args.calls, thread_safe)
+            seconds = run(fn, threads, args.calls, args.entries)
+            total = threads * args.calls * 3
+            print('threads=%-3d thread_safe=%-5s %10.0f calls/s' % (threads, thread_safe, total / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""Performance benchmarks for stubs, fluent setup and matchers.
+
+Every benchmark is run over a grid of parameters and its best time per operation and peak memory (measured with
+tracemalloc in a separate run) are reported. Results can be saved as a baseline and later runs compared against it.
+
+Usage:
+    python -m benchmarks [--filter TEXT] [--sizes 1,100,10000,100000] [--save FILE] [--compare FILE]
+"""
+from __future__ import print_function, division
+import argparse
+import gc
+import itertools
+import json
+import sys
+import timeit
+import tracemalloc
+try:
+    from unittest.mock import Mock, call
+except ImportError:
+    from mock import Mock, call
+
+from mockextras import stub, seq, when, Any, Contains, AnyOf
+
+
+DEFAULT_SIZES = (1, 100, 10000, 100000)
+MATCHER_RATIOS = (0.0, 0.5, 1.0)
+ARG_SIZES = (1, 1000)
+SEQUENCE_LENGTHS = (10, 1000, 100000)
+
+
+def _arg(i, arg_size):
+    return str(i).ljust(arg_size, '.')
+
+
+def _stub_table(size, matcher_ratio, arg_size):
+    """A stub whose first entries use matchers and the rest literal arguments, all expecting (i, string)."""
+    matchers = int(size * matcher_ratio)
+    entries = [(call(i, Any(str).such_that(lambda s: len(s) > 0)), i) for i in range(matchers)]
+    entries += [(call(i, _arg(i, arg_size)), i) for i in range(matchers, size)]
+    return entries
+
+
+def bench_stub_lookup(size, matcher_ratio, arg_size):
+    """Calls a stub with the arguments of its last entry, the worst case for a linear scan."""
+    fn = stub(*_stub_table(size, matcher_ratio, arg_size))
+    args = (size - 1, _arg(size - 1, arg_size))
+    fn(*args)
+    return lambda: fn(*args)
+
+
+def bench_stub_miss(size, matcher_ratio, arg_size):
+    """Calls a stub with arguments it isn't configured for and renders the error."""
+    fn = stub(*_stub_table(size, matcher_ratio, arg_size))
+    args = (-1, _arg(-1, arg_size))
+
+    def run():
+        try:
+            fn(*args)
+        except Exception as err:  #pylint: disable=broad-except
+            str(err)
+    return run
+
+
+def bench_stub_construction(size, matcher_ratio, arg_size):
+    """Builds a stub and makes its first call, which includes building any lookup structures."""
+    entries = _stub_table(size, matcher_ratio, arg_size)
+    args = (size - 1, _arg(size - 1, arg_size))
+    return lambda: stub(*entries)(*args)
+
+
+def bench_fluent_setup(size, matcher_ratio, arg_size):
+    """Configures a mock with when().called_with().then() for every entry of the table."""
+    entries = _stub_table(size, matcher_ratio, arg_size)
+
+    def run():
+        mock_fn = Mock()
+        for key, result in entries:
+            when(mock_fn).called_with(*key[1]).then(result)
+    return run
+
+
+def bench_then_sequence(length):
+    """Configures a then() chain of the given length and drains it through the mock."""
+    def run():
+        mock_fn = Mock()
+        called_with = when(mock_fn).called_with(1)
+        for i in range(length):
+            called_with.then(i)
+        for _ in range(length):
+            mock_fn(1)
+    return run
+
+
+def bench_seq_sequence(length):
+    """Drains a seq() of the given length through a stub."""
+    def run():
+        fn = stub((call(1), seq(range(length))))
+        for _ in range(length):
+            fn(1)
+    return run
+
+
+def bench_batch(length):
+    """Calls a stub of 1000 literal entries with a batch of the given length, made of ten distinct calls."""
+    fn = stub(*_stub_table(1000, 0.0, 1))
+    calls = [(i, _arg(i, 1)) for i in range(990, 1000)] * (length // 10)
+    return lambda: fn.batch(calls)
+
+
+def bench_any_eq(arg_size):
+    matcher = Any(str).such_that(lambda s: len(s) == arg_size)
+    arg = _arg(0, arg_size)
+    return lambda: matcher == arg
+
+
+def bench_contains_eq(arg_size):
+    matcher = Contains('needle')
+    arg = _arg(0, arg_size) + 'needle'
+    return lambda: matcher == arg
+
+
+def bench_any_of_eq(arg_size):
+    matcher = AnyOf(*[_arg(i, arg_size) for i in range(100)])
+    arg = _arg(99, arg_size)
+    return lambda: matcher == arg
+
+
+def bench_all_of_eq(arg_size):
+    """A deeply composed matcher, which should cost about the same as one hand written predicate."""
+    matcher = Any(str)
+    for i in range(20):
+        matcher = matcher & ~Contains('needle%d' % i) & Any().such_that(lambda s: len(s) == arg_size)
+    arg = _arg(0, arg_size)
+    return lambda: matcher == arg
+
+
+def cases(sizes):
+    """Yields (name, params, factory) for every benchmark in the grid."""
+    for fn in (bench_stub_lookup, bench_stub_miss, bench_stub_construction, bench_fluent_setup):
+        for size, ratio, arg_size in itertools.product(sizes, MATCHER_RATIOS, ARG_SIZES):
+            yield fn.__name__, dict(size=size, matcher_ratio=ratio, arg_size=arg_size), fn
+    for fn in (bench_then_sequence, bench_seq_sequence, bench_batch):
+        for length in SEQUENCE_LENGTHS:
+            yield fn.__name__, dict(length=length), fn
+    for fn in (bench_any_eq, bench_contains_eq, bench_any_of_eq, bench_all_of_eq):
+        for arg_size in ARG_SIZES:
+            yield fn.__name__, dict(arg_size=arg_size), fn
+
+
+def case_id(name, params):
+    return '%s[%s]' % (name, ','.join('%s=%s' % item for item in sorted(params.items())))
+
+
+def measure(factory, params, min_time=0.2, repeat=3):
+    """Returns the best time per call of the benchmarked function and the peak memory allocated by one call."""
+    run = factory(**params)
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange() if hasattr(timer, 'autorange') else (1, None)
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run = factory(**params)
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.clear_traces()
+        baseline, _ = tracemalloc.get_traced_memory()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, max(0, peak - baseline)
+
+
+def compare(results, baseline, threshold):
+    """Prints the ratio of each result to its baseline and returns the ids of those slower than threshold."""
+    regressions = []
+    for cid in sorted(results):
+        if cid not in baseline:
+            continue
+        ratio = results[cid]['time'] / baseline[cid]['time']
+        flag = ''
+        if ratio > threshold:
+            regressions.append(cid)
+            flag = '  REGRESSION'
+        print('%-70s %6.2fx%s' % (cid, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filter', default='', help='only run benchmarks whose id contains this text')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma separated stub table sizes (default: %(default)s)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per timing run')
+    parser.add_argument('--save', metavar='FILE', help='save the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='compare the results against a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown ratio reported as a regression (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = {}
+    for name, params, factory in cases(sizes):
+        cid = case_id(name, params)
+        if args.filter not in cid:
+            continue
+        seconds, peak = measure(factory, params, min_time=args.min_time)
+        results[cid] = dict(time=seconds, peak=peak)
+        print('%-70s %12.2f us %12d bytes' % (cid, seconds * 1e6, peak))
+        sys.stdout.flush()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
@@ -1,3 +1,49 @@
-from ._stub import *
-from ._fluent import *
-from ._matchers import *
+# The public names are imported from their modules on first use, so that importing mockextras is cheap for test
+# processes that never use most of it. Python 2, and python 3 before 3.7, don't support module __getattr__ and
+# import everything up front.
+import sys
+
+_exports = {
+    'seq': '_stub', 'stub': '_stub', 'UnexpectedStubCall': '_stub',
+    'when': '_fluent',
+    'Any': '_matchers', 'Contains': '_matchers', 'ContainsAnyOf': '_matchers', 'Matches': '_matchers',
+    'AnyOf': '_matchers', 'SameContentAs': '_matchers', 'AllOf': '_matchers', 'Or': '_matchers', 'Not': '_matchers',
+    'ArrayEqual': '_arrays', 'ArrayClose': '_arrays',
+    'FrameEqual': '_frames', 'SeriesEqual': '_frames',
+    'Latency': '_latency', 'LatencyStats': '_latency', 'VirtualClock': '_latency', 'delayed': '_latency',
+    'record': '_record', 'replay': '_record',
+    'precompiled': '_precompiled',
+    'seq_from_file': '_seqfile',
+    'collect_stats': '_stats', 'reset_stats': '_stats', 'stats_report': '_stats', 'StubStats': '_stats',
+    'EntryStats': '_stats',
+}
+if sys.version_info >= (3, 5):
+    # async stubs need async def
+    _exports['async_stub'] = '_async'
+
+__all__ = sorted(_exports)
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        module = _exports.get(name)
+        if module is None:
+            raise AttributeError("module 'mockextras' has no attribute %r" % name)
+        value = getattr(__import__(__name__ + '.' + module, fromlist=[name]), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(__all__))
+else:
+    from ._stub import *
+    from ._fluent import *
+    from ._matchers import *
+    from ._arrays import *
+    from ._frames import *
+    from ._latency import *
+    from ._record import *
+    from ._precompiled import *
+    from ._seqfile import *
+    from ._stats import *
+    if sys.version_info >= (3, 5):
+        from ._async import *
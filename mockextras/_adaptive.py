@@ -0,0 +1,167 @@
+# mockextras.adaptive
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+from decimal import Decimal
+from fractions import Fraction
+from ._index import _TYPED_ONLY_TYPES, _is_plain, _split
+from ._matchers import Any
+
+
+# The types of the values a plain value can be equal to, e.g. 1 == 1.0 == True == Decimal(1)
+_NUMBERS = set([bool, int, float, complex, Decimal, Fraction])
+try:
+    _NUMBERS.add(long)  #pylint: disable=undefined-variable
+    # python 2 compares str with unicode and bytearray
+    _FAMILIES = [frozenset([str, unicode, bytearray])]  #pylint: disable=undefined-variable
+except NameError:
+    _FAMILIES = [frozenset([str]), frozenset([bytes, bytearray])]
+_FAMILIES += [frozenset(_NUMBERS), frozenset([frozenset, set])]
+
+
+def _equal_types(value):
+    """The types of the values a plain value can be equal to."""
+    t = type(value)
+    for family in _FAMILIES:
+        if t in family:
+            return family
+    return (t,)
+
+
+def _type_of(matcher):
+    """The type of everything a matcher matches, if it is an Any(cls)."""
+    if type(matcher) is Any and type(matcher._cls) is type:  #pylint: disable=protected-access
+        return matcher._cls  #pylint: disable=protected-access
+    return None
+
+
+_disjoint_types_cache = {}
+
+
+def _disjoint_types(cls, other):
+    """True if no object can be an instance of both classes."""
+    pair = cls, other
+    disjoint = _disjoint_types_cache.get(pair)
+    if disjoint is None:
+        disjoint = False
+        if not issubclass(cls, other) and not issubclass(other, cls):
+            # Classes that can't be combined, e.g. int and str, have no common instances. Trying would run any
+            # __init_subclass__ hook, so classes with one are assumed to overlap.
+            if not any('__init_subclass__' in vars(c) for c in cls.__mro__[:-1] + other.__mro__[:-1]):
+                try:
+                    type('_Probe', pair, {})
+                except TypeError:
+                    disjoint = True
+        _disjoint_types_cache[pair] = disjoint
+    return disjoint
+
+
+def _disjoint_values(value, other):
+    """True if no plain or typed only argument can be equal to both configured values."""
+    if _is_plain(value) and _is_plain(other):
+        # NaN isn't equal to itself but an argument can still match it by identity
+        return value == value and other == other and value != other  #pylint: disable=comparison-with-itself
+    if _is_plain(other):
+        value, other = other, value
+    cls = _type_of(other)
+    if cls is None:
+        return False
+    if _is_plain(value):
+        return not any(issubclass(t, cls) for t in _equal_types(value))
+    value_cls = _type_of(value)
+    return value_cls is not None and _disjoint_types(value_cls, cls)
+
+
+def _disjoint(split, other):
+    """True if no call with plain or typed only arguments can match both the configured call and the one split."""
+    other_split = _split(other)
+    if other_split is None:
+        return False
+    (args, kwargs), (other_args, other_kwargs) = split, other_split
+    if len(args) != len(other_args) or set(kwargs) != set(other_kwargs):
+        return True
+    return (any(_disjoint_values(a, b) for a, b in zip(args, other_args)) or
+            any(_disjoint_values(kwargs[name], other_kwargs[name]) for name in kwargs))
+
+
+def _comparable_split(k):
+    """Returns the args and kwargs of a call if they are all plain or typed only, so disjoint entries can't both
+    match it, or None."""
+    split = _split(k)
+    if split is None:
+        return None
+    args, kwargs = split
+    for arg in args:
+        if not _is_plain(arg) and type(arg) not in _TYPED_ONLY_TYPES:
+            return None
+    for arg in kwargs.values():
+        if not _is_plain(arg) and type(arg) not in _TYPED_ONLY_TYPES:
+            return None
+    return split
+
+
+class _HotEntries(object):
+    """The most hit entries of a stub that no earlier entry can overlap, which lookups compare first.
+
+    An entry is promoted once it has been hit threshold times, if it is disjoint from every entry configured before
+    it: the entries differ in shape, in a plain value, or in a plain value or Any(cls) and an Any(cls) of an
+    unrelated type. Then no earlier entry can match a call that it matches, so it is the first match whichever order
+    they are compared in. Entries added later can't change that. At most size entries are promoted, the most hit
+    first. The promoted entries are replaced rather than modified, so lookups can read them without locking.
+    """
+    size = 8
+    threshold = 16
+
+    def __init__(self):
+        self._entries = ()
+        self._results = None
+        self._size = 0
+        self._hits = {}
+        self._promotable = {}
+
+    @property
+    def promoted(self):
+        """The positions of the promoted entries, the most hit first."""
+        return tuple(entry[0] for entry in self._entries)
+
+    def entries(self, results):
+        """The position, args and kwargs of each promoted entry, or none if the configuration has been replaced."""
+        if results is not self._results or len(results) < self._size:
+            return ()
+        return self._entries
+
+    def hit(self, results, position):
+        """Counts a hit of an entry, promoting it if it is hit often enough and can be."""
+        if results is not self._results or len(results) < self._size:
+            self.__init__()
+            self._results = results
+        self._size = len(results)
+        hits = self._hits
+        count = hits[position] = hits.get(position, 0) + 1
+        entries = self._entries
+        for i, entry in enumerate(entries):
+            if entry[0] == position:
+                if i and hits[entries[i - 1][0]] < count:
+                    entries = list(entries)
+                    entries[i - 1], entries[i] = entry, entries[i - 1]
+                    self._entries = tuple(entries)
+                return
+        if (count >= self.threshold and (len(entries) < self.size or hits[entries[-1][0]] < count) and
+                self._can_promote(results, position)):
+            entry = (position,) + _split(results[position][0])
+            self._entries = tuple(sorted(entries + (entry,), key=lambda e: -hits[e[0]])[:self.size])
+
+    def _can_promote(self, results, position):
+        promotable = self._promotable.get(position)
+        if promotable is None:
+            split = _split(results[position][0])
+            promotable = split is not None and all(_disjoint(split, results[p][0]) for p in range(position))
+            self._promotable[position] = promotable
+        return promotable
@@ -0,0 +1,152 @@
+# mockextras.arrays
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+from ._matchers import _Matcher
+
+__all__ = ['ArrayEqual', 'ArrayClose']
+
+
+# Arrays are compared this many elements at a time, which keeps the temporary arrays numpy allocates small and
+# stops at the first chunk that differs.
+_CHUNK_SIZE = 1 << 16
+
+
+def _numpy():
+    """numpy is an optional dependency, it's only imported when an array matcher is created."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy is required to use the array matchers")
+    return numpy
+
+
+def _chunked(compare, actual, expected):
+    """Applies compare to corresponding chunks of the arrays, stopping at the first one that doesn't match."""
+    if not (actual.flags.c_contiguous and expected.flags.c_contiguous) or actual.size <= _CHUNK_SIZE:
+        return bool(compare(actual, expected))
+    actual, expected = actual.reshape(-1), expected.reshape(-1)
+    for start in range(0, actual.size, _CHUNK_SIZE):
+        stop = start + _CHUNK_SIZE
+        if not compare(actual[start:stop], expected[start:stop]):
+            return False
+    return True
+
+
+class _ArrayMatcher(_Matcher):
+    # numpy isn't kept in a slot, modules can't be pickled or copied
+    __slots__ = ('_expected',)
+
+    def __init__(self, expected):
+        self._expected = _numpy().asarray(expected)
+
+    def _compatible(self, other):
+        return isinstance(other, _numpy().ndarray) and other.shape == self._expected.shape
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self._expected)
+
+
+class ArrayEqual(_ArrayMatcher):
+    """Matchers act as wildcards when defining a stub or when asserting call arguments.
+
+    The ArrayEqual matcher will match numpy arrays with the same shape, dtype and values as the given array.
+    Arrays are rejected on shape and dtype before their values are compared, and large arrays are compared in
+    chunks so no full size temporary array is allocated. Use equal_nan=True to treat NaNs as equal and
+    check_dtype=False to compare values of different dtypes.
+
+    >>> import numpy as np
+    >>> assert ArrayEqual([1, 2, 3]) == np.array([1, 2, 3])
+    >>> assert ArrayEqual([1, 2, 3]) != np.array([1, 2, 4])
+    >>> assert ArrayEqual([1, 2, 3]) != np.array([1., 2., 3.])
+    >>> assert ArrayEqual([1, 2, 3], check_dtype=False) == np.array([1., 2., 3.])
+    >>> assert ArrayEqual([1., np.nan], equal_nan=True) == np.array([1., np.nan])
+
+    ArrayEqual can be used when specifying stubs, which would otherwise fail comparing arrays:
+
+    >>> try:
+    ...     from unittest.mock Mock, call
+    ... except ImportError:
+    ...     from mock import Mock, call
+    >>>
+    >>> from mockextras import stub
+    >>> mock = Mock()
+    >>> mock.side_effect = stub((call(ArrayEqual([1, 2, 3])), 6),
+    ...                         (call(ArrayEqual([4, 5, 6])), 15))
+    >>> mock(np.array([4, 5, 6]))
+    15
+
+    numpy is an optional dependency, it must be installed to create array matchers.
+    """
+    __slots__ = ('_equal_nan', '_check_dtype')
+
+    def __init__(self, expected, equal_nan=False, check_dtype=True):
+        _ArrayMatcher.__init__(self, expected)
+        self._equal_nan = equal_nan and self._expected.dtype.kind in 'fc'
+        self._check_dtype = check_dtype
+
+    def __eq__(self, other):
+        if not self._compatible(other):
+            return False
+        if self._check_dtype and other.dtype != self._expected.dtype:
+            return False
+        np = _numpy()
+        if self._equal_nan:
+            return _chunked(lambda a, b: np.array_equal(a, b, equal_nan=True), other, self._expected)
+        return _chunked(np.array_equal, other, self._expected)
+
+
+class ArrayClose(_ArrayMatcher):
+    """Matchers act as wildcards when defining a stub or when asserting call arguments.
+
+    The ArrayClose matcher will match numeric numpy arrays with the same shape as the given array and values
+    within a tolerance of it, as numpy.allclose: absolute(actual - expected) <= atol + rtol * absolute(expected).
+    Arrays are rejected on shape and dtype before their values are compared, and large arrays are compared in
+    chunks so no full size temporary array is allocated.
+
+    >>> import numpy as np
+    >>> assert ArrayClose([1., 2.]) == np.array([1., 2.000000001])
+    >>> assert ArrayClose([1., 2.]) != np.array([1., 2.1])
+    >>> assert ArrayClose([1., 2.], atol=0.2) == np.array([1., 2.1])
+    >>> assert ArrayClose([100., 200.], rtol=0.01) == np.array([101., 198.])
+    >>> assert ArrayClose([1., 2.]) != np.array(['1', '2'])
+
+    ArrayClose can be used when specifying stubs:
+
+    >>> try:
+    ...     from unittest.mock Mock, call
+    ... except ImportError:
+    ...     from mock import Mock, call
+    >>>
+    >>> from mockextras import stub
+    >>> mock = Mock()
+    >>> mock.side_effect = stub((call(ArrayClose([0.1, 0.2], atol=1e-6)), 'weights'))
+    >>> mock(np.array([0.1, 0.2000001]))
+    'weights'
+
+    numpy is an optional dependency, it must be installed to create array matchers.
+    """
+    __slots__ = ('_rtol', '_atol', '_equal_nan')
+
+    def __init__(self, expected, rtol=1e-05, atol=1e-08, equal_nan=False):
+        _ArrayMatcher.__init__(self, expected)
+        self._rtol = rtol
+        self._atol = atol
+        self._equal_nan = equal_nan
+
+    def __eq__(self, other):
+        if not self._compatible(other) or other.dtype.kind not in 'biufc':
+            return False
+        np, rtol, atol, equal_nan = _numpy(), self._rtol, self._atol, self._equal_nan
+        return _chunked(lambda a, b: np.allclose(a, b, rtol=rtol, atol=atol, equal_nan=equal_nan),
+                        other, self._expected)
+
+    def __repr__(self):
+        return 'ArrayClose(%r, rtol=%r, atol=%r)' % (self._expected, self._rtol, self._atol)
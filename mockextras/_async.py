@@ -0,0 +1,122 @@
+# mockextras.async
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+# This module uses async def so it's only imported on python 3.5 and later.
+
+from ._compat import AsyncMockMixin, call
+from ._latency import _Delayed
+from ._stub import _Stub
+import asyncio
+import inspect
+
+
+__all__ = ['async_stub']
+
+
+def _is_async_mock(mock_fn):
+    return AsyncMockMixin is not None and isinstance(mock_fn, AsyncMockMixin)
+
+
+class _AsyncStub(_Stub):
+    """A stub whose calls return coroutines.
+
+    The configured call is looked up, and any sequence advanced, synchronously when the coroutine is first run, so
+    there is never an await between finding an entry and taking its result. Concurrent tasks on one event loop
+    therefore can't interleave inside a lookup and each value of a sequence is handed out exactly once.
+    """
+    def __init__(self, *args, **options):
+        _Stub.__init__(self, *args, **options)
+        self._mark_coroutine_function()
+
+    def _mark_coroutine_function(self):
+        # AsyncMock awaits its side_effect only if it looks like a coroutine function
+        if hasattr(inspect, 'markcoroutinefunction'):
+            inspect.markcoroutinefunction(self)
+        else:
+            self._is_coroutine = asyncio.coroutines._is_coroutine  #pylint: disable=protected-access
+
+    def __getstate__(self):
+        state = _Stub.__getstate__(self)
+        # the markers are compared by identity, so they are set again when unpickled
+        state.pop('_is_coroutine_marker', None)
+        state.pop('_is_coroutine', None)
+        return state
+
+    def __setstate__(self, state):
+        _Stub.__setstate__(self, state)
+        self._mark_coroutine_function()
+
+    async def __call__(self, *args, **kwargs):
+        return await self._result(self._lookup(call(*args, **kwargs)))
+
+    async def _result(self, obj):
+        if type(obj) is _Delayed:
+            seconds, timed_out = obj.sample()
+            wait = getattr(obj.latency.clock, 'wait', None)
+            await (asyncio.sleep(seconds) if wait is None else wait(seconds))
+            if timed_out:
+                raise obj.latency.timeout_error()
+            obj = obj.result
+        obj = self._take(obj)
+        if inspect.iscoroutinefunction(obj):
+            obj = obj()
+        if inspect.isawaitable(obj):
+            obj = await obj
+        return obj
+
+    async def _batch(self, arguments):
+        results = []
+        for found, obj in self._batch_lookups(arguments):
+            if not found:
+                results.append(obj)
+                continue
+            try:
+                results.append(await self._result(obj))
+            except Exception as err:  #pylint: disable=broad-except
+                results.append(err)
+        return results
+
+
+def async_stub(*args, **options):
+    return _AsyncStub(*args, **options)
+
+
+async_stub.__doc__ = """Makes stubs whose calls are awaited, for use stand-alone or as the side_effect of an AsyncMock.
+
+An async stub is configured exactly like a stub, see stub() for the details. Calling it returns a coroutine which
+resolves to the configured result. Results which are awaitable, such as futures, are awaited and results which
+are coroutine functions, such as async functions taking no arguments, are called and awaited on every call. So a
+result can be computed, delayed or made to fail later:
+
+>>> import asyncio
+>>> try:
+...     from unittest.mock call
+... except ImportError:
+...     from mock import call
+>>>
+>>> async def slow_world():
+...     await asyncio.sleep(0.1)
+...     return "world"
+>>>
+>>> fn = async_stub((call("hello"), slow_world),
+...                 (call("foo"),   1, 2, 4, 8))
+>>> asyncio.run(fn("hello"))
+'world'
+>>> asyncio.run(fn("foo"))
+1
+
+Pass a coroutine function rather than a coroutine, a coroutine can only be awaited once. Entries delayed with
+delayed() await their latency, on a VirtualClock concurrent calls wait in parallel in virtual time. when() installs an async
+stub on an AsyncMock, so called_with().then() accepts the same results. The lookup never awaits, so an async stub
+can be called from thousands of concurrent tasks on an event loop; use thread_safe=True if it is also called from
+other threads. The batch() and batch_columns() of an async stub return a coroutine resolving to the list of
+results, each call awaited in turn.
+"""
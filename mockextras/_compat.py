@@ -0,0 +1,28 @@
+# mockextras.compat
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+# The mock library is unittest.mock in python 3 and the mock backport in python 2. It's resolved here once, the
+# rest of mockextras imports it from this module.
+
+try:
+    from unittest import mock
+except ImportError:
+    try:
+        from mock import mock
+    except ImportError:
+        import mock
+
+call = mock.call
+_Call = mock._Call  #pylint: disable=protected-access
+_is_exception = mock._is_exception  #pylint: disable=protected-access
+_is_instance_mock = mock._is_instance_mock  #pylint: disable=protected-access
+# AsyncMock is only in python 3.8 and later
+AsyncMockMixin = getattr(mock, 'AsyncMockMixin', None)
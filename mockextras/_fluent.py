@@ -10,70 +10,86 @@
 # Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
 
 from ._matchers import __all__ as matchers_all
+from ._latency import delayed
 from ._stub import _Sequence, _Stub
-try:
-    from unittest.mock import call, _is_exception, _is_instance_mock
-except ImportError:
-    try:
-        from mock.mock import call, _is_exception, _is_instance_mock
-    except ImportError:
-        from mock import call, _is_exception, _is_instance_mock
+from ._compat import call, _is_exception, _is_instance_mock
+from collections import deque
 from os import linesep
+try:
+    from ._async import _AsyncStub, _is_async_mock
+except (ImportError, SyntaxError):
+    _AsyncStub = None
 
 
 __all__ = ['when']
 
 
-def when(mock_fn):
-    class ListSeq(_Sequence):
-        def __init__(self):
-            self.list = []
+class _ListSeq(_Sequence):
+    """The results given to then(), returned in turn with the last one repeated. A deque keeps each step O(1)."""
+    __slots__ = ('values',)
 
-        def __call__(self):
-            if len(self.list) > 1:
-                retval = self.list.pop(0)
-            else:
-                retval = self.list[0]
-            if _is_exception(retval):
-                raise retval
-            return retval
+    def __init__(self):  #pylint: disable=super-init-not-called
+        self.values = deque()
 
-    class When(object):
-        def __init__(self, mock_fn):
-            self._mock_fn = mock_fn
-            if not _is_instance_mock(self._mock_fn):
-                raise RuntimeError("mock_fn must be an instance of Mock")
+    def __call__(self):
+        if len(self.values) > 1:
+            retval = self.values.popleft()
+        else:
+            retval = self.values[0]
+        if _is_exception(retval):
+            raise retval
+        return retval
 
-            if not isinstance(self._mock_fn.side_effect, _Stub):
-                if self._mock_fn.side_effect is not None:
-                    raise RuntimeError("Mock '%s' already has a side_effect set defined" % self._mock_fn)
 
-                self._mock_fn.side_effect = _Stub()
+class _When(object):
+    __slots__ = ('_mock_fn',)
 
-            if not isinstance(self._mock_fn.side_effect._results, list):  #pylint: disable=protected-access
-                self._mock_fn.side_effect._results = list(self._mock_fn.side_effect._results)  #pylint: disable=protected-access
+    def __init__(self, mock_fn):
+        self._mock_fn = mock_fn
+        if not _is_instance_mock(self._mock_fn):
+            raise RuntimeError("mock_fn must be an instance of Mock")
 
-        def called_with(self, *args, **kwargs):
-            return CalledWith(self._mock_fn.side_effect._results, call(*args, **kwargs))  #pylint: disable=protected-access
+        if not isinstance(self._mock_fn.side_effect, _Stub):
+            if self._mock_fn.side_effect is not None:
+                raise RuntimeError("Mock '%s' already has a side_effect set defined" % self._mock_fn)
 
-    class CalledWith(object):
-        def __init__(self, results, key):
-            self._results = results
-            self._key = key
-            self._list = None
+            if _AsyncStub is not None and _is_async_mock(self._mock_fn):
+                self._mock_fn.side_effect = _AsyncStub()
+            else:
+                self._mock_fn.side_effect = _Stub()
 
-        def then(self, obj):
-            if self._list is None:
-                s = ListSeq()
-                self._results.append((self._key, s))
-                self._list = s.list
+    def called_with(self, *args, **kwargs):
+        return _CalledWith(self._mock_fn.side_effect._results, call(*args, **kwargs))  #pylint: disable=protected-access
+
+
+class _CalledWith(object):
+    __slots__ = ('_results', '_key', '_list')
+
+    def __init__(self, results, key):
+        self._results = results
+        self._key = key
+        self._list = None
+
+    def then(self, obj, latency=None):
+        if self._list is None:
+            s = _ListSeq()
+            s.values.append(obj)
+            self._list = s.values
+            # only publish the entry once it has a result, another thread may be calling the stub
+            self._results.append((self._key, s if latency is None else delayed(latency, s)))
+        elif latency is not None:
+            raise RuntimeError("The latency applies to every result of '%s', give it to the first then()" %
+                               (self._key,))
+        else:
             self._list.append(obj)
-            return self
+        return self
+
+    def __repr__(self):
+        return ""
 
-        def __repr__(self):
-            return ""
 
-    return When(mock_fn)
+def when(mock_fn):
+    return _When(mock_fn)
 
 
 when.__doc__ = """Provides a fluent API for specifying stubs.
@@ -140,6 +156,37 @@ specifications ahead of more general ones. For example:
 >>> mock(100, { "key" : 1000 })
 'hello'
 
+With an AsyncMock the results are awaited. then() also accepts awaitables and coroutine functions, which are
+called and awaited each time they are returned, see async_stub() for more info.
+
+>>> try:
+...     from unittest.mock AsyncMock
+... except ImportError:
+...     from mock import AsyncMock
+>>>
+>>> async def delayed():
+...     await asyncio.sleep(0.1)
+...     return "world"
+>>>
+>>> mock = AsyncMock()
+>>> when(mock).called_with("hello").then(delayed)
+<BLANKLINE>
+>>> asyncio.run(mock("hello"))
+'world'
+
+A latency, a Latency or a number of seconds, can be given to the first then() to delay every result, see
+delayed() for more info.
+
+>>> from mockextras import Latency, VirtualClock
+>>> clock = VirtualClock()
+>>> mock = Mock()
+>>> when(mock).called_with("slow").then("result", latency=Latency(p50=0.02, p99=0.5, clock=clock))
+<BLANKLINE>
+>>> mock("slow")
+'result'
+>>> mock.side_effect.latency_stats()
+[(call('slow'), LatencyStats(count=1, timeouts=0, p50=..., p99=..., max=...))]
+
 The following matchers are available in mockextras:
 %s
 
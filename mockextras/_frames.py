@@ -0,0 +1,181 @@
+# mockextras.frames
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+from ._matchers import _Matcher
+from ._scope import _cached
+
+__all__ = ['FrameEqual', 'SeriesEqual']
+
+
+def _pandas():
+    """pandas is an optional dependency, it's only imported when a frame matcher is created."""
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError("pandas is required to use the FrameEqual and SeriesEqual matchers")
+    return pandas
+
+
+def _content_hash(pd, obj):
+    """A hash of the values of a Series or Index, or None if they can't be hashed (e.g. lists in an object column)."""
+    try:
+        return hash(pd.util.hash_pandas_object(obj, index=False).values.tobytes())
+    except TypeError:
+        return None
+
+
+def _is_float(dtype):
+    return getattr(dtype, 'kind', None) in ('f', 'c')
+
+
+class _PandasMatcher(_Matcher):
+    __slots__ = ('_expected', '_rtol', '_atol', '_fingerprint', '_hashes')
+
+    def __init__(self, expected, rtol, atol):
+        # only to fail early without pandas, the matcher looks it up when it's used so it can be pickled
+        _pandas()
+        self._expected = expected
+        self._rtol = rtol
+        self._atol = atol
+        self._fingerprint = self._fingerprint_of(expected)
+        self._hashes = self._hashes_of(expected)
+
+    def _hashes_of(self, obj):
+        raise NotImplementedError
+
+    def _fingerprint_of(self, obj):
+        raise NotImplementedError
+
+    def _close(self, actual, expected):
+        """Compares two columns, with the tolerance if they are floats."""
+        if (self._rtol or self._atol) and _is_float(actual.dtype) and _is_float(expected.dtype):
+            import numpy
+            return bool(numpy.allclose(actual.to_numpy(), expected.to_numpy(), rtol=self._rtol, atol=self._atol,
+                                       equal_nan=True))
+        return actual.equals(expected)
+
+    def __repr__(self):
+        return '%s(<%s of shape %s>)' % (type(self).__name__, type(self._expected).__name__,
+                                         self._expected.shape)
+
+
+class FrameEqual(_PandasMatcher):
+    """Matchers act as wildcards when defining a stub or when asserting call arguments.
+
+    The FrameEqual matcher will match pandas DataFrames equal to the given one: with the same index, columns,
+    dtypes and values. Use ignore_column_order=True to allow the columns in any order and rtol and atol to compare
+    float columns with a tolerance, as numpy.allclose.
+
+    >>> import pandas as pd
+    >>> expected = pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.2]})
+    >>> assert FrameEqual(expected) == pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.2]})
+    >>> assert FrameEqual(expected) != pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.3]})
+    >>> assert FrameEqual(expected) != pd.DataFrame({'b': [0.1, 0.2], 'a': [1, 2]})
+    >>> assert FrameEqual(expected, ignore_column_order=True) == pd.DataFrame({'b': [0.1, 0.2], 'a': [1, 2]})
+    >>> assert FrameEqual(expected, atol=0.01) == pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.201]})
+
+    A DataFrame is first compared on a cheap fingerprint: its shape, columns, dtypes and a hash of its index. Only
+    then are the values compared, using content hashes of the columns. The hashes of the DataFrames passed to a
+    stub are cached while the stub looks for a match, so they are computed once however many entries they are
+    compared against. The expected DataFrame is hashed when the matcher is created and must not be modified.
+
+    FrameEqual can be used when specifying stubs:
+
+    >>> try:
+    ...     from unittest.mock Mock, call
+    ... except ImportError:
+    ...     from mock import Mock, call
+    >>>
+    >>> from mockextras import stub
+    >>> mock = Mock()
+    >>> mock.side_effect = stub((call(FrameEqual(expected)), 'expected'),
+    ...                         (call(Any(pd.DataFrame)), 'something else'))
+    >>> mock(expected.copy())
+    'expected'
+
+    pandas is an optional dependency, it must be installed to create frame matchers.
+    """
+    __slots__ = ('_ignore_column_order',)
+
+    def __init__(self, expected, ignore_column_order=False, rtol=0, atol=0):
+        self._ignore_column_order = ignore_column_order
+        _PandasMatcher.__init__(self, expected, rtol, atol)
+
+    def _fingerprint_of(self, frame):
+        pd = _pandas()
+        columns = tuple(zip(frame.columns, map(str, frame.dtypes)))
+        if self._ignore_column_order:
+            columns = frozenset(columns)
+        return frame.shape, columns, frame.columns.is_unique, _content_hash(pd, frame.index)
+
+    def _hashes_of(self, frame):
+        if not frame.columns.is_unique:
+            return None
+        return dict((column, _content_hash(_pandas(), frame[column])) for column in frame.columns)
+
+    def __eq__(self, other):
+        if not isinstance(other, _pandas().DataFrame):
+            return False
+        if _cached(other, (FrameEqual, self._ignore_column_order), self._fingerprint_of) != self._fingerprint:
+            return False
+        expected = self._expected
+        if self._hashes is None:
+            # duplicate column names, compare the frames as a whole
+            return other.equals(expected)
+        hashes = _cached(other, FrameEqual, self._hashes_of)
+        tolerant = self._rtol or self._atol
+        for column, expected_hash in self._hashes.items():
+            if tolerant and _is_float(expected[column].dtype):
+                continue
+            if hashes[column] != expected_hash:
+                return False
+        # the hashes match, so confirm the values do
+        return all(self._close(other[column], expected[column]) for column in expected.columns)
+
+
+class SeriesEqual(_PandasMatcher):
+    """Matchers act as wildcards when defining a stub or when asserting call arguments.
+
+    The SeriesEqual matcher will match pandas Series equal to the given one: with the same index, name, dtype
+    and values. Use rtol and atol to compare floats with a tolerance, as numpy.allclose.
+
+    >>> import pandas as pd
+    >>> expected = pd.Series([0.1, 0.2], name='x')
+    >>> assert SeriesEqual(expected) == pd.Series([0.1, 0.2], name='x')
+    >>> assert SeriesEqual(expected) != pd.Series([0.1, 0.2], name='y')
+    >>> assert SeriesEqual(expected) != pd.Series([0.1, 0.21], name='x')
+    >>> assert SeriesEqual(expected, atol=0.1) == pd.Series([0.1, 0.21], name='x')
+
+    Series are compared on a fingerprint and content hashes which are cached during a stub lookup, as described
+    for FrameEqual.
+
+    pandas is an optional dependency, it must be installed to create frame matchers.
+    """
+    __slots__ = ()
+
+    def __init__(self, expected, rtol=0, atol=0):
+        _PandasMatcher.__init__(self, expected, rtol, atol)
+
+    def _fingerprint_of(self, series):
+        return series.shape, str(series.dtype), series.name, _content_hash(_pandas(), series.index)
+
+    def _hashes_of(self, series):
+        return _content_hash(_pandas(), series)
+
+    def __eq__(self, other):
+        if not isinstance(other, _pandas().Series):
+            return False
+        if _cached(other, (SeriesEqual, 'fingerprint'), self._fingerprint_of) != self._fingerprint:
+            return False
+        if not ((self._rtol or self._atol) and _is_float(other.dtype)):
+            if _cached(other, SeriesEqual, self._hashes_of) != self._hashes:
+                return False
+        return self._close(other, self._expected)
@@ -0,0 +1,293 @@
+# mockextras.index
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from fractions import Fraction
+from binascii import hexlify
+from heapq import merge
+from ._matchers import Any, _Combinator, _Matcher
+from ._compat import _Call
+
+
+# Types whose equality is consistent with their hash, so two values of these types can only compare equal when
+# they land in the same dict bucket. Subclasses are deliberately excluded as they may override __eq__.
+_PLAIN_TYPES = set([type(None), bool, int, float, complex, str, bytes,
+                    Decimal, Fraction, date, datetime, time, timedelta])
+try:
+    _PLAIN_TYPES.update([unicode, long])  #pylint: disable=undefined-variable
+except NameError:
+    pass
+_PLAIN_TYPES = frozenset(_PLAIN_TYPES)
+
+
+def _is_plain(value):
+    """True if the value can only be equal to values that have the same hash."""
+    t = type(value)
+    if t in _PLAIN_TYPES:
+        return True
+    if t is tuple or t is frozenset:
+        return all(_is_plain(v) for v in value)
+    # Objects using the default identity based equality (e.g. sentinels) are plain too, as long as they are not
+    # pretending to be something else through __class__ (e.g. a Mock with a spec).
+    return t.__eq__ is object.__eq__ and t.__hash__ is object.__hash__ and value.__class__ is t
+
+
+# Builtin types with well behaved equality that are not hashable. They can't be looked up in a dict but they can be
+# dispatched on by type.
+_TYPED_ONLY_TYPES = frozenset([list, dict, set, bytearray])
+
+
+def _split(k):
+    """Returns the args and kwargs of a plain call, or None if k is anything else."""
+    if type(k) is not _Call or len(k) != 3 or getattr(k, '_mock_parent', None) is not None:
+        return None
+    name, args, kwargs = k
+    if name:
+        return None
+    return args, kwargs
+
+
+def _signature(args, kwargs):
+    """Returns a hashable signature for call arguments, or None if any of them are not plain."""
+    for arg in args:
+        if not _is_plain(arg):
+            return None
+    for arg in kwargs.values():
+        if not _is_plain(arg):
+            return None
+    return args, frozenset(kwargs.items())
+
+
+def _typed(value):
+    if type(value) is tuple:
+        return tuple, tuple(_typed(v) for v in value)
+    if type(value) is frozenset:
+        return frozenset, frozenset(_typed(v) for v in value)
+    return type(value), value
+
+
+def _typed_signature(args, kwargs):
+    """Returns a hashable signature for call arguments that also tells apart equal values of different types, e.g.
+    1 and 1.0 which a matcher such as Any(float) can tell apart, or None if any of them are not plain."""
+    if _signature(args, kwargs) is None:
+        return None
+    return tuple(_typed(arg) for arg in args), frozenset((name, _typed(arg)) for name, arg in kwargs.items())
+
+
+def _has_predicates(value):
+    """True if comparing with the value could run user code, e.g. such_that predicates or a custom __eq__ such as
+    a hamcrest style matcher's, which may not give the same answer every time."""
+    if isinstance(value, _Matcher):
+        if isinstance(value, _Combinator):
+            return any(_has_predicates(m) for m in value._matchers)  #pylint: disable=protected-access
+        return value._runs_predicates()  #pylint: disable=protected-access
+    if _is_plain(value):
+        return False
+    t = type(value)
+    if t is tuple or t is list or t is frozenset or t is set:
+        return any(_has_predicates(v) for v in value)
+    if t is dict:
+        return any(_has_predicates(k) or _has_predicates(v) for k, v in value.items())
+    return t is not bytearray
+
+
+def _is_pure(key):
+    """False if matching the key could run user predicates, which may have side effects."""
+    split = _split(key)
+    if split is None:
+        return not _has_predicates(key)
+    args, kwargs = split
+    return not any(_has_predicates(arg) for arg in args) and not any(_has_predicates(arg) for arg in kwargs.values())
+
+
+def _shape(args, kwargs):
+    return len(args), frozenset(kwargs)
+
+
+def _bits(mask):
+    """Yields the positions of the set bits of mask in ascending order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _mask(members):
+    """Returns the bitmask with the bits of members set, in time linear in the size of the mask."""
+    if len(members) < 8:
+        mask = 0
+        for member in members:
+            mask |= 1 << member
+        return mask
+    bits = bytearray((max(members) >> 3) + 1)
+    for member in members:
+        bits[member >> 3] |= 1 << (member & 7)
+    bits.reverse()
+    return int(hexlify(bytes(bits)), 16)
+
+
+class _Discriminator(object):
+    """Narrows the entries of a shape down to those that could match the value passed at one argument position.
+
+    Plain configured values are dispatched through a dict and Any(cls) through the MRO of the type of the value.
+    Any other matcher is a wildcard and always survives. The members of each branch are kept as lists, a bitmask
+    per configured value would take memory quadratic in the number of entries, and the masks that are shared by
+    every lookup are built by seal() once a batch of entries has been added. Lookups never modify the
+    discriminator, so they can run while another thread adds entries.
+    """
+    def __init__(self):
+        self._literals = {}
+        self._typed = {}
+        self._wildcards = []
+        self._all_literals = []
+        self._masks = 0, 0, {}
+        self._dirty = False
+
+    def add(self, member, value):
+        if _is_plain(value):
+            self._literals.setdefault(value, []).append(member)
+            self._all_literals.append(member)
+        elif type(value) is Any and type(value._cls) is type:  #pylint: disable=protected-access
+            self._typed.setdefault(value._cls, []).append(member)  #pylint: disable=protected-access
+        else:
+            self._wildcards.append(member)
+        self._dirty = True
+
+    def seal(self):
+        if self._dirty:
+            self._masks = (_mask(self._wildcards), _mask(self._all_literals),
+                           dict((cls, _mask(members)) for cls, members in self._typed.items()))
+            self._dirty = False
+
+    def match(self, value, everything):
+        wildcards, all_literals, typed = self._masks
+        t = type(value)
+        if _is_plain(value):
+            mask = wildcards | _mask(self._literals.get(value, ()))
+        elif t in _TYPED_ONLY_TYPES:
+            mask = wildcards | all_literals
+        else:
+            # e.g. a matcher passed in as an argument, which can be equal to anything
+            return everything
+        if typed:
+            for cls in t.__mro__:
+                mask |= typed.get(cls, 0)
+        return mask
+
+
+class _Shape(object):
+    """The entries configured with a given number of positional arguments and set of keyword argument names."""
+    def __init__(self, nargs, names):
+        self._positions = list(range(nargs)) + sorted(names)
+        self._discriminators = [_Discriminator() for _ in self._positions]
+        self._members = []
+        self._matcher_members = []
+        self._matchers = 0
+
+    def add(self, position, args, kwargs, exact):
+        member = len(self._members)
+        self._members.append(position)
+        if not exact:
+            self._matcher_members.append(member)
+        for p, discriminator in zip(self._positions, self._discriminators):
+            discriminator.add(member, args[p] if isinstance(p, int) else kwargs[p])
+
+    def seal(self):
+        """Builds the masks used by lookups for the entries added since the last seal."""
+        self._matchers = _mask(self._matcher_members)
+        for discriminator in self._discriminators:
+            discriminator.seal()
+
+    def candidates(self, args, kwargs, exact):
+        members = self._members
+        everything = (1 << len(members)) - 1
+        mask = self._matchers if exact else everything
+        for p, discriminator in zip(self._positions, self._discriminators):
+            if not mask:
+                break
+            mask &= discriminator.match(args[p] if isinstance(p, int) else kwargs[p], everything)
+        return [members[bit] for bit in _bits(mask)]
+
+
+class _StubIndex(object):
+    """Indexes the configuration of a stub so that a lookup only has to compare the entries that could match.
+
+    Entries whose call arguments are all plain values are bucketed by their signature. All entries that are plain
+    calls are also grouped by shape into a per-argument-position discrimination tree, which narrows the entries
+    using matchers down to those that could match. Entries that aren't plain calls are always compared. The
+    candidates for a call are merged back into configuration order so the first configured match still wins.
+    """
+    def __init__(self):
+        self._results = None
+        self._size = 0
+        self._exact = {}
+        self._shapes = {}
+        self._always = []
+
+    def is_synced(self, results):
+        return results is self._results and len(results) == self._size
+
+    def sync(self, results):
+        """Indexes any entries added to results since the last sync, or reindexes it if it has been replaced."""
+        if results is not self._results or len(results) < self._size:
+            self.__init__()
+            self._results = results
+        size = len(results)
+        touched = set()
+        for position in range(self._size, size):
+            shape = self._add(position, results[position][0])
+            if shape is not None:
+                touched.add(shape)
+        for shape in touched:
+            shape.seal()
+        # Until the size is updated lookups from other threads treat the new entries as unindexed
+        self._size = size
+
+    def _add(self, position, key):
+        """Indexes an entry, returning the shape it was added to if any."""
+        split = _split(key)
+        if split is None:
+            self._always.append(position)
+            return None
+        args, kwargs = split
+        sig = _signature(args, kwargs)
+        if sig is not None:
+            self._exact.setdefault(sig, []).append(position)
+        key = _shape(args, kwargs)
+        shape = self._shapes.get(key)
+        if shape is None:
+            shape = _Shape(*key)
+            self._shapes[key] = shape
+        shape.add(position, args, kwargs, sig is not None)
+        return shape
+
+    def candidates(self, results, k):
+        """Returns the positions in results of the entries that might match k, in configuration order.
+
+        Entries added to results since the last sync are always included.
+        """
+        size = self._size
+        if results is not self._results or len(results) < size:
+            return range(len(results))
+        tail = range(size, len(results))
+        split = _split(k)
+        if split is None:
+            return range(len(results))
+        args, kwargs = split
+        sig = _signature(args, kwargs)
+        shape = self._shapes.get(_shape(args, kwargs))
+        tree = shape.candidates(args, kwargs, sig is not None) if shape is not None else ()
+        bucket = self._exact.get(sig, ()) if sig is not None else ()
+        streams = [stream for stream in (bucket, tree, self._always, tail) if stream]
+        if len(streams) == 1:
+            return streams[0]
+        return merge(*streams)
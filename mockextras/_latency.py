@@ -0,0 +1,247 @@
+# mockextras.latency
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+from array import array
+from heapq import heapify, heappop, heappush
+import itertools
+import math
+import random
+import threading
+import time as _time
+
+__all__ = ['Latency', 'LatencyStats', 'VirtualClock', 'delayed']
+
+
+try:
+    _TimeoutError = TimeoutError
+except NameError:
+    from socket import timeout as _TimeoutError
+
+# The 99th percentile of the standard normal distribution, used to fit a log-normal distribution to a p50 and p99
+_Z99 = 2.3263478740408408
+
+
+class _RealClock(object):
+    """The default clock, stubs really sleep."""
+    time = staticmethod(_time.time)
+    sleep = staticmethod(_time.sleep)
+
+
+_real_clock = _RealClock()
+
+
+def _loop_of(future):
+    get_loop = getattr(future, 'get_loop', None)
+    return get_loop() if get_loop is not None else future._loop  #pylint: disable=protected-access
+
+
+class VirtualClock(object):
+    """A clock that only moves when stubs sleep on it, so simulated latency costs no real time.
+
+    A synchronous sleep moves the clock forward by the time slept, as if the calls had been made one after another.
+    An asyncio task sleeping on the clock (an async stub awaiting wait()) is woken in order of its wake up time,
+    each time the event loop has run the tasks that are ready, and the clock jumps forward to its wake up time. So
+    concurrent tasks sleep in parallel in virtual time:
+
+    >>> clock = VirtualClock()
+    >>> clock.sleep(1.5)
+    >>> clock.time()
+    1.5
+    """
+    def __init__(self, start=0.0):
+        self._now = start
+        self._lock = threading.Lock()
+        self._sleepers = []
+        self._counter = itertools.count()
+        # the event loop advancing the clock for the tasks sleeping on it, if any
+        self._advancing = None
+
+    def time(self):
+        return self._now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self._now += max(seconds, 0)
+
+    def wait(self, seconds):
+        """Returns an asyncio future that is resolved once the clock reaches seconds from now."""
+        import asyncio
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        if self._advancing is not loop:
+            # The tasks of a loop that was closed while they were sleeping will never wake, e.g. a test that timed
+            # out, so they're forgotten rather than stopping the clock from advancing in this loop.
+            self._sleepers = [sleeper for sleeper in self._sleepers if _loop_of(sleeper[2]) is loop]
+            heapify(self._sleepers)
+            self._advancing = loop
+            loop.call_soon(self._advance, loop)
+        heappush(self._sleepers, (self._now + max(seconds, 0), next(self._counter), future))
+        return future
+
+    def _advance(self, loop):
+        sleepers = self._sleepers
+        while sleepers:
+            wake, _, future = heappop(sleepers)
+            if not future.done():
+                self._now = max(self._now, wake)
+                future.set_result(None)
+                break
+        if sleepers:
+            # the woken task runs before the clock moves again, it may go back to sleep for less than the others
+            loop.call_soon(self._advance, loop)
+        else:
+            self._advancing = None
+
+    def __repr__(self):
+        return 'VirtualClock(%r)' % self._now
+
+
+class Latency(object):
+    """A latency distribution for the results of a stub, see delayed().
+
+    Latencies are log-normally distributed with the given median (p50) and 99th percentile (p99), or fixed at p50
+    if p99 isn't given. Calls that take timeout seconds or longer, and a random timeout_rate of all calls, time out:
+    they take timeout seconds and raise error (by default a TimeoutError) instead of returning their result. Time
+    is charged to clock, by default the real clock, and seed makes the latencies reproducible.
+
+    >>> latency = Latency(p50=0.01, p99=0.2, timeout=1.0, timeout_rate=0.001, clock=VirtualClock(), seed=42)
+    """
+    def __init__(self, p50, p99=None, timeout=None, timeout_rate=0.0, error=None, clock=None, seed=None):
+        if p50 < 0 or (p99 is not None and p99 < p50):
+            raise ValueError("Latency needs 0 <= p50 <= p99")
+        if timeout_rate and timeout is None:
+            raise ValueError("A timeout is needed for a timeout_rate")
+        self.p50 = p50
+        self.p99 = p99
+        self.timeout = timeout
+        self.timeout_rate = timeout_rate
+        self.error = error
+        self.clock = _real_clock if clock is None else clock
+        self._random = random.Random(seed)
+        if p99 is not None and p50 > 0:
+            self._mu = math.log(p50)
+            self._sigma = (math.log(p99) - self._mu) / _Z99
+        else:
+            self._mu = self._sigma = None
+
+    def sample(self):
+        """Returns the latency of a call in seconds and whether it timed out."""
+        rng = self._random
+        seconds = rng.lognormvariate(self._mu, self._sigma) if self._sigma else self.p50
+        timeout = self.timeout
+        if timeout is not None and (seconds >= timeout or (self.timeout_rate and rng.random() < self.timeout_rate)):
+            return timeout, True
+        return seconds, False
+
+    def timeout_error(self):
+        error = self.error
+        if error is None:
+            return _TimeoutError("Simulated timeout after %gs" % self.timeout)
+        return error() if isinstance(error, type) else error
+
+    def __repr__(self):
+        return 'Latency(p50=%r, p99=%r, timeout=%r, timeout_rate=%r)' % (self.p50, self.p99, self.timeout,
+                                                                         self.timeout_rate)
+
+
+class LatencyStats(object):
+    """The latencies a stub entry was called with."""
+    def __init__(self):
+        self._samples = array('d')
+        self._sorted = None
+        self.timeouts = 0
+
+    def record(self, seconds, timed_out):
+        self._samples.append(seconds)
+        self._sorted = None
+        if timed_out:
+            self.timeouts += 1
+
+    @property
+    def count(self):
+        return len(self._samples)
+
+    @property
+    def total(self):
+        return math.fsum(self._samples)
+
+    @property
+    def mean(self):
+        return self.total / len(self._samples) if self._samples else None
+
+    @property
+    def max(self):
+        return max(self._samples) if self._samples else None
+
+    def percentile(self, q):
+        """The nearest-rank q-th percentile, for q from 0 to 100."""
+        if not self._samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        rank = int(math.ceil(q / 100.0 * len(self._sorted)))
+        return self._sorted[min(max(rank, 1), len(self._sorted)) - 1]
+
+    @property
+    def p50(self):
+        return self.percentile(50)
+
+    @property
+    def p99(self):
+        return self.percentile(99)
+
+    def __repr__(self):
+        return 'LatencyStats(count=%d, timeouts=%d, p50=%r, p99=%r, max=%r)' % (self.count, self.timeouts,
+                                                                                self.p50, self.p99, self.max)
+
+
+class _Delayed(object):
+    """A stub result that takes time to come back."""
+    __slots__ = ('latency', 'result', 'stats')
+
+    def __init__(self, latency, result):
+        self.latency = latency
+        self.result = result
+        self.stats = LatencyStats()
+
+    def sample(self):
+        seconds, timed_out = self.latency.sample()
+        self.stats.record(seconds, timed_out)
+        return seconds, timed_out
+
+
+def delayed(latency, *results):
+    """Delays the results of a stub entry, to simulate a slow service:
+
+    >>> try:
+    ...     from unittest.mock call
+    ... except ImportError:
+    ...     from mock import call
+    >>>
+    >>> clock = VirtualClock()
+    >>> fn = stub((call("fast"), "result"),
+    ...           (call("slow"), delayed(Latency(p50=0.02, p99=0.5, clock=clock), "result")))
+    >>> fn("slow")
+    'result'
+    >>> fn.latency_stats()
+    [(call('slow'), LatencyStats(count=1, timeouts=0, p50=..., p99=..., max=...))]
+
+    If more than one result is given they are returned in turn, like the results of a stub entry. latency is a
+    Latency or a number of seconds. The latency of each call is charged to the latency's clock: a stub sleeps on
+    it and an async stub awaits it. Use a VirtualClock to run simulated load tests without real sleeping and the
+    latency_stats() of the stub to see the latencies each entry was called with.
+    """
+    from ._stub import seq  # _stub imports this module
+    if not isinstance(latency, Latency):
+        latency = Latency(latency)
+    if not results:
+        raise TypeError("delayed() needs at least one result")
+    return _Delayed(latency, results[0] if len(results) == 1 else seq(results))
@@ -9,10 +9,85 @@
 # Released subject to the BSD License
 # Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
 
-__all__ = ['Any', 'Contains', 'AnyOf']
+from abc import ABCMeta
+from collections import OrderedDict, deque
+from decimal import Decimal
+from fractions import Fraction
+import re
+try:
+    from hashlib import blake2b as _blake2b
 
+    def _new_hash():
+        return _blake2b(digest_size=16)
+except ImportError:
+    from hashlib import sha1 as _new_hash
+from ._scope import _cached
+try:
+    from abc import get_cache_token
+except ImportError:
+    def get_cache_token():
+        return ABCMeta._abc_invalidation_counter  #pylint: disable=protected-access,no-member
 
-class Any(object):
+__all__ = ['Any', 'Contains', 'ContainsAnyOf', 'Matches', 'AnyOf', 'SameContentAs', 'AllOf', 'Or', 'Not']
+
+
+# isinstance is slow for ABCs, which go through __instancecheck__ and __subclasshook__. As ABCs decide by type
+# their results are cached per (ABC, type of the object), until an ABC is registered with and the token changes.
+# Classes of subclasses of ABCMeta, e.g. runtime checkable protocols, can look at the object itself so aren't cached.
+_abc_instance_cache = {}
+_abc_cache_token = [None]
+
+
+def _is_instance(obj, cls):
+    if type(cls) is not ABCMeta:
+        return isinstance(obj, cls)
+    t = type(obj)
+    if obj.__class__ is not t:
+        return isinstance(obj, cls)
+    token = get_cache_token()
+    if token != _abc_cache_token[0]:
+        _abc_instance_cache.clear()
+        _abc_cache_token[0] = token
+    try:
+        return _abc_instance_cache[cls, t]
+    except KeyError:
+        result = _abc_instance_cache[cls, t] = isinstance(obj, cls)
+        return result
+
+
+class _Matcher(object):
+    """Base class of the matchers. Matchers can be combined with & (AllOf), | (Or) and ~ (Not)."""
+    __slots__ = ()
+
+    # Stops numpy arrays and pandas objects from comparing themselves with a matcher element by element, so that ==
+    # falls back to the matcher
+    __array_ufunc__ = None
+    __pandas_priority__ = 10000
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __and__(self, other):
+        return AllOf(self, other)
+
+    def __rand__(self, other):
+        return AllOf(other, self)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __ror__(self, other):
+        return Or(other, self)
+
+    def __invert__(self):
+        return Not(self)
+
+    def _runs_predicates(self):
+        """True if matching runs user supplied predicates."""
+        return False
+
+
+class Any(_Matcher):
     """Matchers act as wildcards when defining a stub or when asserting call arguments.
     
     The Any matcher will match any object. 
@@ -78,32 +153,58 @@ class Any(object):
     >>> assert mock.call_args_list == [call("bye bye", "world"),
     ...                                call("bye bye", Any())]
     """
+    __slots__ = ('_cls', '_chain', '_flat')
+
     def __init__(self, cls=object, predicates=None):
         self._cls = cls
-        self._predicates = predicates or []
+        # such_that builds a persistent chain of (parent chain, predicate) pairs so that chaining is O(1) and
+        # matchers derived from the same parent share its predicates
+        chain = None
+        for predicate in predicates or ():
+            chain = (chain, predicate)
+        self._chain = chain
+        self._flat = None
 
-    def __eq__(self, other):
-        return (
-            isinstance(other, self._cls) and
-            all(predicate(other) for predicate in self._predicates)
-        )
+    @property
+    def _predicates(self):
+        if self._flat is None:
+            predicates = []
+            chain = self._chain
+            while chain is not None:
+                chain, predicate = chain
+                predicates.append(predicate)
+            predicates.reverse()
+            self._flat = tuple(predicates)
+        return self._flat
 
-    def __ne__(self, other):
-        return not self.__eq__(other)
+    def __eq__(self, other):
+        if not _is_instance(other, self._cls):
+            return False
+        if self._chain is None:
+            return True
+        for predicate in self._predicates:
+            if not predicate(other):
+                return False
+        return True
 
     def __repr__(self):
         base = 'Any(%s)' % ('' if self._cls is object else self._cls)
         such_thats = (
             '.' +
             '.'.join('such_that(%s)' % getattr(p, "__name__", p) for p in self._predicates)
-        ) if self._predicates else ''
+        ) if self._chain is not None else ''
         return base + such_thats
 
     def such_that(self, predicate):
-        return Any(cls=self._cls, predicates=self._predicates + [predicate])
+        matcher = Any(cls=self._cls)
+        matcher._chain = (self._chain, predicate)
+        return matcher
+
+    def _runs_predicates(self):
+        return self._chain is not None
 
 
-class Contains(object):
+class Contains(_Matcher):
     """Matchers act as wildcards when defining a stub or when asserting call arguments.
     
     The Contains matcher will match objects that contain the given value or substring.
@@ -147,20 +248,203 @@ class Contains(object):
     >>> assert mock.call_args_list == [call("bye bye", "world"),
     ...                                call("bye bye", Contains('red'))]
     """
+    __slots__ = ('_value',)
+
     def __init__(self, value):
         self._value = value
 
     def __eq__(self, other):
         return self._value in other
 
-    def __ne__(self, other):
-        return not self.__eq__(other)
-
     def __repr__(self):
         return 'Contains(%r)' % self._value
 
 
-class AnyOf(object):
+_STRING_TYPES = (str, bytes, type(u''))
+
+
+class ContainsAnyOf(_Matcher):
+    """Matchers act as wildcards when defining a stub or when asserting call arguments.
+
+    The ContainsAnyOf matcher will match strings that contain any of the given substrings, or other containers
+    that contain any of the given values.
+
+    >>> mentions_a_pet = ContainsAnyOf('cat', 'dog', 'hamster')
+    >>> assert mentions_a_pet == "the dog ate my homework"
+    >>> assert mentions_a_pet != "the printer ate my homework"
+    >>> assert mentions_a_pet == ['goldfish', 'cat']
+
+    The substrings are compiled into an Aho-Corasick automaton when the matcher is created, so a string is searched
+    for all of them in a single pass however many there are. Use find to get the substring that matched, which is
+    the one ending first in the string:
+
+    >>> mentions_a_pet.find("hot dog or catfish")
+    'dog'
+    >>> mentions_a_pet.find("a car") is None
+    True
+
+    ContainsAnyOf can be used when specifying stubs:
+
+    >>> try:
+    ...     from unittest.mock Mock, call
+    ... except ImportError:
+    ...     from mock import Mock, call
+    >>>
+    >>> from mockextras import stub
+    >>> mock = Mock()
+    >>> mock.side_effect = stub((call(ContainsAnyOf('INSERT', 'UPDATE', 'DELETE')), 'write'),
+    ...                         (call(Any(str)), 'read'))
+    >>> mock("DELETE FROM pets WHERE name = 'Rex'")
+    'write'
+    >>> mock("SELECT * FROM pets")
+    'read'
+    """
+    __slots__ = ('_patterns', '_goto', '_fail', '_out')
+
+    def __init__(self, *patterns):
+        self._patterns = patterns
+        # the trie, node 0 is the root: goto holds the transitions of each node and out the index of the pattern
+        # found on reaching it, either its own or, through the fail links, that of its longest matching suffix
+        goto, out = [{}], [-1]
+        for i, pattern in enumerate(patterns):
+            if not isinstance(pattern, _STRING_TYPES):
+                continue
+            node = 0
+            for symbol in pattern:
+                if symbol not in goto[node]:
+                    goto[node][symbol] = len(goto)
+                    goto.append({})
+                    out.append(-1)
+                node = goto[node][symbol]
+            if out[node] < 0:
+                out[node] = i
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for symbol, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and symbol not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(symbol, 0)
+                if out[child] < 0:
+                    out[child] = out[fail[child]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def _search(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        if out[0] >= 0:
+            return out[0]
+        node = 0
+        for symbol in text:
+            while node and symbol not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(symbol, 0)
+            if out[node] >= 0:
+                return out[node]
+        return -1
+
+    def find(self, other):
+        """Returns the pattern found in other, or None if other doesn't contain any of them."""
+        if isinstance(other, _STRING_TYPES):
+            i = self._search(other)
+            return self._patterns[i] if i >= 0 else None
+        for pattern in self._patterns:
+            if pattern in other:
+                return pattern
+        return None
+
+    def __eq__(self, other):
+        if isinstance(other, _STRING_TYPES):
+            return self._search(other) >= 0
+        return any(pattern in other for pattern in self._patterns)
+
+    def __repr__(self):
+        return 'ContainsAnyOf(%s)' % ', '.join(map(repr, self._patterns))
+
+
+# Compiled regular expressions shared by all Matches matchers. This is separate from the re module's own cache so
+# that stubs with thousands of patterns don't evict each other's, or the rest of the process's, patterns.
+_MAX_COMPILED_PATTERNS = 10000
+_compiled_patterns = OrderedDict()
+
+
+def _compile_pattern(pattern, flags):
+    key = type(pattern), pattern, flags
+    try:
+        regex = _compiled_patterns.pop(key)
+    except KeyError:
+        regex = re.compile(pattern, flags)
+        while len(_compiled_patterns) >= _MAX_COMPILED_PATTERNS:
+            _compiled_patterns.popitem(last=False)
+    _compiled_patterns[key] = regex
+    return regex
+
+
+class Matches(_Matcher):
+    """Matchers act as wildcards when defining a stub or when asserting call arguments.
+
+    The Matches matcher will match strings (or bytes) in which the regular expression can be found.
+
+    >>> has_a_number = Matches(r'[0-9]+')
+    >>> assert has_a_number == 'route 66'
+    >>> assert has_a_number != 'route sixty six'
+    >>> assert Matches(b'^GET ') == b'GET /index.html'
+
+    Use fullmatch=True to match the whole string and flags to pass flags to re:
+
+    >>> import re
+    >>> assert Matches(r'[a-z]+', fullmatch=True) == 'hello'
+    >>> assert Matches(r'[a-z]+', fullmatch=True) != 'hello world'
+    >>> assert Matches(r'hello', re.IGNORECASE) == 'HELLO WORLD'
+
+    Patterns are compiled once and kept in a bounded cache shared by all Matches matchers.
+
+    Matches can be used when specifying stubs:
+
+    >>> try:
+    ...     from unittest.mock Mock, call
+    ... except ImportError:
+    ...     from mock import Mock, call
+    >>>
+    >>> from mockextras import stub
+    >>> mock = Mock()
+    >>> mock.side_effect = stub((call(Matches(r'^SELECT .* FROM pets')), ['Rex', 'Tiddles']),
+    ...                         (call(Any(str)), []))
+    >>> mock("SELECT name FROM pets")
+    ['Rex', 'Tiddles']
+    """
+    __slots__ = ('_pattern', '_flags', '_fullmatch', '_match')
+
+    def __init__(self, pattern, flags=0, fullmatch=False):
+        self._pattern = pattern
+        self._flags = flags
+        self._fullmatch = fullmatch
+        if fullmatch:
+            regex = _compile_pattern(pattern, flags)
+            if not hasattr(regex, 'fullmatch'):
+                regex = _compile_pattern(type(pattern)(r'(?:') + pattern + type(pattern)(r')\Z'), flags)
+                self._match = regex.match
+            else:
+                self._match = regex.fullmatch
+        else:
+            self._match = _compile_pattern(pattern, flags).search
+
+    def __eq__(self, other):
+        try:
+            return self._match(other) is not None
+        except TypeError:
+            # not a string, or bytes given to a str pattern and vice versa
+            return False
+
+    def __repr__(self):
+        options = ''.join([', flags=%r' % self._flags if self._flags else '',
+                           ', fullmatch=True' if self._fullmatch else ''])
+        return 'Matches(%r%s)' % (self._pattern, options)
+
+
+class AnyOf(_Matcher):
     """Matchers act as wildcards when defining a stub or when asserting call arguments.
     
     The AnyOf matcher will ....
@@ -169,6 +453,15 @@ class AnyOf(object):
     >>> assert is_a_small_prime == 3
     >>> assert is_a_small_prime != 4
 
+    The candidates don't have to be hashable, hashable ones are found by hash and the others compared in turn:
+
+    >>> is_an_origin = AnyOf(0, (0, 0), [0, 0], {'x': 0, 'y': 0})
+    >>> assert is_an_origin == [0, 0]
+    >>> assert is_an_origin == {'x': 0, 'y': 0}
+    >>> assert is_an_origin != [0, 1]
+
+    Use AnyOf.from_pool for large collections of candidates.
+
     AnyOf can be used when specifying stubs:
     
     >>> try:
@@ -200,14 +493,374 @@ class AnyOf(object):
     >>> assert mock.call_args_list == [call("donkey"),
     ...                                call(AnyOf('monkey', 'donkey', 'badger'))]
     """
+    __slots__ = ('_hashed', '_linear', '_pool')
+
     def __init__(self, *args):
-        self._set = set(args)
+        # hashable candidates are looked up in a set, unhashable ones (e.g. lists or dicts) are compared one by one
+        self._hashed = set()
+        self._linear = []
+        self._pool = False
+        for arg in args:
+            try:
+                self._hashed.add(arg)
+            except TypeError:
+                self._linear.append(arg)
+
+    @classmethod
+    def from_pool(cls, pool):
+        """Matches any of the candidates in pool, which is used as is rather than copied.
+
+        Sets, frozensets and dicts are looked up by hash. Any other container, such as an array or a range, is
+        searched using its own __contains__.
+
+        >>> from array import array
+        >>> is_known_id = AnyOf.from_pool(frozenset(range(1000000)))
+        >>> assert is_known_id == 999999
+        >>> is_small_id = AnyOf.from_pool(array('i', range(100)))
+        >>> assert is_small_id == 42
+        >>> assert is_small_id != 100
+        """
+        matcher = cls()
+        matcher._pool = True
+        if isinstance(pool, (set, frozenset, dict)):
+            matcher._hashed = pool
+        else:
+            matcher._linear = pool
+        return matcher
 
     def __eq__(self, other):
-        return other in self._set
+        try:
+            if other in self._hashed:
+                return True
+        except TypeError:
+            pass
+        return other in self._linear
 
-    def __ne__(self, other):
-        return not self.__eq__(other)
+    def __repr__(self):
+        if self._pool:
+            pool = self._hashed or self._linear
+            return 'AnyOf.from_pool(<%s of %d candidates>)' % (type(pool).__name__, len(pool))
+        return 'AnyOf(%s)' % ', '.join(map(repr, list(self._hashed) + self._linear))
+
+
+_NUMBER_TYPES = frozenset([bool, int, float, complex, Decimal, Fraction, type(2 ** 64)])
+_TEXT_TYPES = frozenset([str, type(u'')])
+_BINARY_TYPES = frozenset([bytes, bytearray])
+_INFINITY = float('inf')
+
+
+def _number_content(obj):
+    """The exact value of a number as text, the same for numbers that are equal, e.g. 1, 1.0, True and Decimal(1),
+    or None for NaN, which isn't equal to anything."""
+    t = type(obj)
+    if t is complex:
+        if obj.imag == 0:
+            return _number_content(obj.real)
+        real, imag = _number_content(obj.real), _number_content(obj.imag)
+        return None if real is None or imag is None else 'c%s,%s' % (real, imag)
+    if t is float or t is Decimal:
+        if obj.is_nan() if t is Decimal else obj != obj:  #pylint: disable=comparison-with-itself
+            return None
+        if obj.is_infinite() if t is Decimal else obj in (_INFINITY, -_INFINITY):
+            return 'f%r' % float(obj)
+        obj = Fraction(obj)
+    if type(obj) is Fraction:
+        if obj.denominator != 1:
+            return 'q%d/%d' % (obj.numerator, obj.denominator)
+        obj = obj.numerator
+    return 'i%d' % obj
+
+
+def _content_digest(obj):
+    """A digest of the content of an object made of builtin types, such that objects that are equal have the same
+    digest. Returns None for anything else, as its equality is unknown.
+    """
+    t = type(obj)
+    h = _new_hash()
+    if t in _BINARY_TYPES:
+        h.update(b'b')
+        h.update(obj)
+    elif t in _TEXT_TYPES:
+        h.update(b's')
+        h.update(obj.encode('utf-8', 'surrogatepass'))
+    elif t in _NUMBER_TYPES:
+        content = _number_content(obj)
+        if content is None:
+            return None
+        h.update(content.encode('ascii'))
+    elif obj is None:
+        h.update(b'N')
+    elif t is list or t is tuple:
+        h.update(b'l' if t is list else b't')
+        for item in obj:
+            digest = _content_digest(item)
+            if digest is None:
+                return None
+            h.update(digest)
+    elif t is dict or t is set or t is frozenset:
+        # unordered, so the digests of the items are sorted
+        if t is dict:
+            h.update(b'd')
+            items = [(_content_digest(k), _content_digest(v)) for k, v in obj.items()]
+            if any(k is None or v is None for k, v in items):
+                return None
+            digests = sorted(k + v for k, v in items)
+        else:
+            h.update(b'S')
+            digests = [_content_digest(item) for item in obj]
+            if None in digests:
+                return None
+            digests.sort()
+        for digest in digests:
+            h.update(digest)
+    else:
+        return None
+    return h.digest()
+
+
+def _fingerprint(obj):
+    try:
+        return _content_digest(obj)
+    except RuntimeError:
+        # too deeply nested, or self referential
+        return None
+
+
+class SameContentAs(_Matcher):
+    """Matchers act as wildcards when defining a stub or when asserting call arguments.
+
+    The SameContentAs matcher will match objects with the same content as the given object, which can be made of
+    strings, bytes, numbers, None, lists, tuples, dicts and sets.
+
+    >>> payload = {'records': [{'id': 1, 'tags': ['a', 'b']}, {'id': 2, 'tags': []}], 'blob': b'...'}
+    >>> assert SameContentAs(payload) == {'blob': b'...', 'records': [{'id': 1, 'tags': ['a', 'b']},
+    ...                                                               {'id': 2, 'tags': []}]}
+    >>> assert SameContentAs(payload) != {'blob': b'...', 'records': []}
+
+    Rather than walking both objects on every comparison, a fingerprint of the content is computed once for the
+    expected object, when the matcher is created, and for each argument of a call to a stub, however many of its
+    entries the argument is compared against. The expected object must not be modified afterwards. Objects that
+    contain anything else are compared using ==.
+
+    SameContentAs can be used when specifying stubs:
+
+    >>> try:
+    ...     from unittest.mock Mock, call
+    ... except ImportError:
+    ...     from mock import Mock, call
+    >>>
+    >>> from mockextras import stub
+    >>> mock = Mock()
+    >>> mock.side_effect = stub((call(SameContentAs(payload)), 'accepted'),
+    ...                         (call(Any()), 'rejected'))
+    >>> mock(dict(payload))
+    'accepted'
+    """
+    __slots__ = ('_expected', '_fingerprint')
+
+    def __init__(self, expected):
+        self._expected = expected
+        self._fingerprint = _fingerprint(expected)
+
+    def __eq__(self, other):
+        if self._fingerprint is not None:
+            fingerprint = _cached(other, SameContentAs, _fingerprint)
+            if fingerprint is not None:
+                return fingerprint == self._fingerprint
+        return other == self._expected
 
     def __repr__(self):
-        return 'AnyOf(%s)' % ', '.join(map(repr, self._set))
+        return 'SameContentAs(%s)' % _abbreviated_repr(self._expected)
+
+
+def _abbreviated_repr(obj, limit=80):
+    text = repr(obj)
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+
+def _conjuncts(matcher, namespace, depth):
+    """Compiles a matcher to expressions in o that must all hold: its type checks and everything else."""
+    if type(matcher) is Any:
+        cls = matcher._cls
+        check = isinstance if type(cls) is type or not isinstance(cls, ABCMeta) else _is_instance
+        types = [] if cls is object else ['%s(o, %s)' % (_bind(check, namespace), _bind(cls, namespace))]
+        return types, ['%s(o)' % _bind(p, namespace) for p in matcher._predicates]
+    if type(matcher) is AllOf:
+        types, others = [], []
+        for m in matcher._matchers:
+            t, o = _conjuncts(m, namespace, depth)
+            types += t
+            others += o
+        return types, others
+    if type(matcher) is Or:
+        alternatives = [_expression(m, namespace, depth + 1) for m in matcher._matchers]
+        return [], ['(%s)' % ' or '.join(alternatives) or 'False']
+    if type(matcher) is Not:
+        return [], ['not %s' % _expression(matcher._matcher, namespace, depth + 1)]
+    if type(matcher) is Contains:
+        return [], ['%s in o' % _bind(matcher._value, namespace)]
+    return [], ['%s == o' % _bind(matcher, namespace)]
+
+
+# The parser only allows so many nested parentheses, combinators nested deeper are compiled separately
+_MAX_NESTING = 32
+
+
+def _expression(matcher, namespace, depth=0):
+    if depth > _MAX_NESTING and isinstance(matcher, _Combinator):
+        return '(%s == o)' % _bind(matcher, namespace)
+    types, others = _conjuncts(matcher, namespace, depth)
+    # the type checks are cheap and mean the predicates are only given objects of the expected type
+    return '(%s)' % (' and '.join(types + others) or 'True')
+
+
+def _bind(value, namespace):
+    name = '_%d' % len(namespace)
+    namespace[name] = value
+    return name
+
+
+def _compile(matcher):
+    """Flattens a matcher into a single short-circuiting function of the object being matched."""
+    namespace = {}
+    source = 'def match(o):\n    return %s\n' % _expression(matcher, namespace)
+    exec(source, namespace)  #pylint: disable=exec-used
+    return namespace['match']
+
+
+class _Combinator(_Matcher):
+    __slots__ = ('_matchers', '_match')
+
+    def __init__(self, *matchers):
+        self._matchers = tuple(matchers)
+        self._match = None
+
+    def __eq__(self, other):
+        if self._match is None:
+            self._match = _compile(self)
+        return self._match(other)
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(map(repr, self._matchers)))
+
+    def __reduce__(self):
+        # the compiled function can't be pickled or copied, the copy compiles its own when it's first used
+        return type(self), self._matchers
+
+    def _runs_predicates(self):
+        return any(isinstance(m, _Matcher) and m._runs_predicates() for m in self._matchers)
+
+
+class AllOf(_Combinator):
+    """Matchers act as wildcards when defining a stub or when asserting call arguments.
+
+    The AllOf matcher will match objects that match all of the given matchers or values. It can also be written
+    using &.
+
+    >>> short_greeting = AllOf(Any(str).such_that(lambda s: len(s) < 6), Contains('h'))
+    >>> assert short_greeting == 'hello'
+    >>> assert short_greeting != 'good morning'
+    >>> assert (Any(str).such_that(lambda s: len(s) < 6) & Contains('h')) == 'hello'
+
+    Combined matchers are flattened into a single function when they're first used, with the type checks of any
+    Any(cls) matchers done ahead of the other checks, so they cost about the same as one hand written predicate.
+
+    AllOf can be used when specifying stubs:
+
+    >>> try:
+    ...     from unittest.mock Mock, call
+    ... except ImportError:
+    ...     from mock import Mock, call
+    >>>
+    >>> from mockextras import stub
+    >>> mock = Mock()
+    >>> mock.side_effect = stub((call(AllOf(Any(int), AnyOf(2, 3, 5, 7))), 'small prime'),
+    ...                         (call(Any(int)), 'something else'))
+    >>> mock(5)
+    'small prime'
+    >>> mock(4)
+    'something else'
+    """
+    __slots__ = ()
+
+    def __init__(self, *matchers):
+        # nested AllOfs are flattened, e.g. a & b & c is a single AllOf
+        flattened = []
+        for m in matchers:
+            flattened.extend(m._matchers if type(m) is AllOf else [m])
+        _Combinator.__init__(self, *flattened)
+
+
+class Or(_Combinator):
+    """Matchers act as wildcards when defining a stub or when asserting call arguments.
+
+    The Or matcher will match objects that match any of the given matchers or values. It can also be written
+    using |.
+
+    >>> number_or_empty = Or(Any(int), Any(float), '')
+    >>> assert number_or_empty == 1
+    >>> assert number_or_empty == 1.5
+    >>> assert number_or_empty == ''
+    >>> assert number_or_empty != 'hello'
+    >>> assert (Any(int) | Contains('a')) == 'abc'
+
+    Or can be used when specifying stubs:
+
+    >>> try:
+    ...     from unittest.mock Mock, call
+    ... except ImportError:
+    ...     from mock import Mock, call
+    >>>
+    >>> from mockextras import stub
+    >>> mock = Mock()
+    >>> mock.side_effect = stub((call(Or(Any(int), Any(float))), 'number'),
+    ...                         (call(Any()), 'not a number'))
+    >>> mock(1.5)
+    'number'
+    >>> mock('1.5')
+    'not a number'
+    """
+    __slots__ = ()
+
+    def __init__(self, *matchers):
+        flattened = []
+        for m in matchers:
+            flattened.extend(m._matchers if type(m) is Or else [m])
+        _Combinator.__init__(self, *flattened)
+
+
+class Not(_Combinator):
+    """Matchers act as wildcards when defining a stub or when asserting call arguments.
+
+    The Not matcher will match objects that don't match the given matcher or value. It can also be written
+    using ~.
+
+    >>> not_a_string = Not(Any(str))
+    >>> assert not_a_string == 100
+    >>> assert not_a_string != 'hello'
+    >>> assert (~Contains('a')) == 'hello'
+
+    Not can be used when specifying stubs:
+
+    >>> try:
+    ...     from unittest.mock Mock, call
+    ... except ImportError:
+    ...     from mock import Mock, call
+    >>>
+    >>> from mockextras import stub
+    >>> mock = Mock()
+    >>> mock.side_effect = stub((call(Not(None)), 'something'),
+    ...                         (call(None), 'nothing'))
+    >>> mock(0)
+    'something'
+    >>> mock(None)
+    'nothing'
+    """
+    __slots__ = ()
+
+    def __init__(self, matcher):
+        _Combinator.__init__(self, matcher)
+
+    @property
+    def _matcher(self):
+        return self._matchers[0]
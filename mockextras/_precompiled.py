@@ -0,0 +1,224 @@
+# mockextras.precompiled
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+from ._compat import _Call
+from ._stub import _Stub
+from functools import wraps
+try:
+    import copyreg
+except ImportError:
+    import copy_reg as copyreg
+import gc
+import hashlib
+import inspect
+import io
+import os
+import pickle
+import re
+import sys
+import tempfile
+import warnings
+
+__all__ = ['precompiled']
+
+
+def _restore_call(value, name, from_kall):
+    c = tuple.__new__(_Call, value)
+    c._mock_name = name  #pylint: disable=protected-access
+    c._mock_parent = None  #pylint: disable=protected-access
+    c._mock_from_kall = from_kall  #pylint: disable=protected-access
+    return c
+
+
+def _reduce_call(c):
+    # Calls don't survive pickle on their own, their __getattr__ makes a new call for any attribute. They are
+    # restored without going through _Call.__new__, which is slow enough to dominate the loading of a large stub.
+    return _restore_call, (tuple(c), c._mock_name, c._mock_from_kall)  #pylint: disable=protected-access
+
+
+def _dumps(obj):
+    f = io.BytesIO()
+    pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = copyreg.dispatch_table.copy()
+    pickler.dispatch_table[_Call] = _reduce_call
+    pickler.dump(obj)
+    return f.getvalue()
+
+
+def _loads(data):
+    # A stub is made of many small objects which the garbage collector would scan over and over while they are
+    # unpickled, more than doubling the time it takes. None of them can be garbage yet.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+_package_digest = None
+
+
+def _package_source_digest():
+    """A digest of the source of mockextras, so cached stubs are rebuilt when mockextras changes."""
+    global _package_digest  #pylint: disable=global-statement
+    if _package_digest is None:
+        digest = hashlib.sha1()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.py'):
+                with open(os.path.join(directory, name), 'rb') as f:
+                    digest.update(name.encode('utf-8') + b'\0' + f.read())
+        _package_digest = digest.hexdigest()
+    return _package_digest
+
+
+def _source_file(build):
+    """The file a function is defined in, or None if there is none, e.g. if it was typed into the interpreter."""
+    try:
+        return inspect.getsourcefile(build)
+    except TypeError:
+        return None
+
+
+def _closure(build):
+    """The pickled values of the variables of enclosing functions that a function uses."""
+    cells = getattr(build, '__closure__', None) or ()
+    return _dumps([cell.cell_contents for cell in cells])
+
+
+def _source_digest(build, source, closure, depends):
+    digest = hashlib.sha1()
+    digest.update(('%s %d.%d %s' % (_package_source_digest(), sys.version_info[0], sys.version_info[1],
+                                    getattr(build, '__qualname__', build.__name__))).encode('utf-8'))
+    digest.update(b'\0' + closure)
+    for path in [source] + list(depends):
+        with open(path, 'rb') as f:
+            digest.update(b'\0' + f.read())
+    return digest.hexdigest()
+
+
+def _file_name_part(name):
+    # e.g. the <locals> in the qualified name of a nested function, < and > aren't allowed in file names on Windows
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+
+
+def _default_directory(source):
+    return os.path.join(os.path.dirname(os.path.abspath(source)), '__pycache__')
+
+
+def _load(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except (IOError, OSError):
+        return None
+
+
+def _save(directory, prefix, path, data):
+    """Writes the file atomically, so concurrent sessions (e.g. xdist workers) never read a partial file."""
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=prefix, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        getattr(os, 'replace', os.rename)(temporary, path)
+    except Exception:
+        os.remove(temporary)
+        raise
+    # remove the stubs built from earlier versions of the source
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith('.pickle') and os.path.join(directory, name) != path:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def _build_stub(build):
+    fn = build()
+    if not isinstance(fn, _Stub):
+        raise TypeError("%s must return a stub, not %r" % (build.__name__, fn))
+    return fn
+
+
+def precompiled(directory=None, depends=()):
+    """A decorator that caches the stub built by a function on disk, so it's only built when its source changes.
+
+    The decorated function takes no arguments and returns a stub. The first time it's called the stub is built,
+    its lookup index is built and both are pickled to a file. Later calls, also in later sessions and other
+    processes, unpickle a fresh copy of the stub from the file, which is much faster than building a large stub.
+
+    >>> @precompiled()
+    ... def market_data():
+    ...     return stub(*[(call(ticker, day), price) for ticker, day, price in load_prices()])
+    >>>
+    >>> mock_client.get_price.side_effect = market_data()
+
+    The file is keyed by a hash of the source file of the function, so any change to that file (and to mockextras
+    or the python version) builds the stub again. Files the stub is built from, e.g. data files, can be given as
+    depends so changing them does too. If the function is nested in another one, the values of the variables it
+    uses from the enclosing function are part of the key. Module globals and anything else the function reads
+    aren't tracked, pass the files they come from as depends. The file is kept in the __pycache__ directory next to
+    the source file unless a directory is given. Use when() on a local mock and return its side_effect to cache a
+    stub configured with the fluent API.
+
+    The stub has to be picklable: matchers with such_that predicates and results such as mocks can't be pickled.
+    Such stubs are built every time, with a warning, as are stubs built by nested functions that use variables
+    which can't be pickled. Functions without a source file, e.g. typed into the interpreter, aren't cached.
+    """
+    def decorator(build):
+        loaded = []
+
+        @wraps(build)
+        def wrapper():
+            if loaded:
+                return _loads(loaded[0])
+            source = _source_file(build)
+            if source is None:
+                # there is nothing to key the file by
+                return _build_stub(build)
+            try:
+                closure = _closure(build)
+            except Exception as err:  #pylint: disable=broad-except
+                warnings.warn("The stub built by %s can't be cached, the variables it uses from the enclosing "
+                              "function can't be pickled: %s" % (build.__name__, err))
+                return _build_stub(build)
+            cache_directory = directory or _default_directory(source)
+            prefix = 'mockextras-%s-%s-' % (_file_name_part(build.__module__),
+                                            _file_name_part(getattr(build, '__qualname__', build.__name__)))
+            path = os.path.join(cache_directory,
+                                '%s%s.pickle' % (prefix, _source_digest(build, source, closure, depends)))
+            data = _load(path)
+            if data is not None:
+                try:
+                    fn = _loads(data)
+                except Exception:  #pylint: disable=broad-except
+                    # e.g. a class of a result has since been changed
+                    pass
+                else:
+                    loaded.append(data)
+                    return fn
+
+            fn = _build_stub(build)
+            fn._index.sync(fn._results)  #pylint: disable=protected-access
+            try:
+                data = _dumps(fn)
+            except Exception as err:  #pylint: disable=broad-except
+                warnings.warn("The stub built by %s can't be cached: %s" % (build.__name__, err))
+                return fn
+            _save(cache_directory, prefix, path, data)
+            loaded.append(data)
+            return _loads(data)
+        return wrapper
+    return decorator
@@ -0,0 +1,272 @@
+# mockextras.record
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+from ._compat import call
+from ._index import _split
+from ._stub import _Sequence, _Stub
+from array import array
+from collections import OrderedDict
+import mmap
+import pickle
+import struct
+import threading
+
+__all__ = ['record', 'replay']
+
+
+# A recording starts with _MAGIC and is followed by records, each a _HEADER of the lengths of the name of the
+# called attribute, the pickled arguments and the pickled result, then those three. Records are only ever appended
+# so a recording that was cut short, e.g. by a crash, can still be replayed up to its last complete record.
+_MAGIC = b'mockextras recording 1\n'
+_HEADER = struct.Struct('<III')
+# The arguments are looked up by their pickled bytes, so they are always pickled with the same protocol
+_PROTOCOL = 2
+
+try:
+    _OFFSET_TYPE = array('q').typecode
+except ValueError:
+    _OFFSET_TYPE = 'l'
+
+_BUILTINS = frozenset(['builtins', '__builtin__'])
+
+
+def _arguments_blob(args, kwargs):
+    return pickle.dumps((args, tuple(sorted(kwargs.items()))), _PROTOCOL)
+
+
+class _Writer(object):
+    def __init__(self, path):
+        self._file = open(path, 'ab')
+        self._lock = threading.Lock()
+        if self._file.tell() == 0:
+            self._file.write(_MAGIC)
+            self._file.flush()
+
+    def write(self, name, args, kwargs, raised, result):
+        name = name.encode('utf-8')
+        arguments = _arguments_blob(args, kwargs)
+        result = pickle.dumps((raised, result), pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._file.write(_HEADER.pack(len(name), len(arguments), len(result)) + name + arguments + result)
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _Recorder(object):
+    """Calls through to its target, recording each call and its result or exception."""
+    def __init__(self, target, writer, name=''):
+        self._target = target
+        self._writer = writer
+        self._name = name
+
+    def __call__(self, *args, **kwargs):
+        try:
+            result = self._target(*args, **kwargs)
+        except Exception as err:
+            self._writer.write(self._name, args, kwargs, True, err)
+            raise
+        self._writer.write(self._name, args, kwargs, False, result)
+        return result
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        # methods are recorded, and so are the methods of attributes that are objects of user defined classes
+        if attr.startswith('_') or not (callable(value) or type(value).__module__ not in _BUILTINS):
+            return value
+        return _Recorder(value, self._writer, self._name + '.' + attr if self._name else attr)
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def record(target, path):
+    """Wraps a callable, or an object, recording every call made through the wrapper to the file at path.
+
+    The recording can be replayed as a stub with replay(). Calls of the methods of an object, and of the methods of
+    its attributes, are recorded under their attribute names. Results and exceptions are pickled, so they must be
+    picklable, and calls are appended to the file so a recording can be built up over several runs:
+
+    >>> with record(MarketDataClient(), 'prices.rec') as client:
+    ...     client.get_price('VOD.L', date(2015, 1, 2))
+    ...     client.get_price('BARC.L', date(2015, 1, 2))
+    """
+    return _Recorder(target, _Writer(path))
+
+
+class _Recording(object):
+    """A recording file, indexed on first use.
+
+    The file is memory mapped and only the names and arguments of the records are read while indexing, the results
+    are unpickled when they are replayed.
+    """
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._map = None
+        self._calls = None
+
+    def calls(self, name):
+        """Returns an ordered dict of the pickled arguments of the calls of name to the offsets of their records."""
+        if self._calls is None:
+            with self._lock:
+                if self._calls is None:
+                    self._index()
+        return self._calls.get(name, {})
+
+    def _index(self):
+        with open(self._path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError("%s is not a mockextras recording" % self._path)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._map
+        calls = {}
+        position, end = len(_MAGIC), len(data)
+        while position + _HEADER.size <= end:
+            name_length, arguments_length, result_length = _HEADER.unpack_from(data, position)
+            start = position + _HEADER.size
+            stop = start + name_length + arguments_length + result_length
+            if stop > end:
+                # the last record was only partly written
+                break
+            name = data[start:start + name_length].decode('utf-8')
+            arguments = data[start + name_length:start + name_length + arguments_length]
+            offsets = calls.setdefault(name, OrderedDict()).get(arguments)
+            if offsets is None:
+                offsets = calls[name][arguments] = array(_OFFSET_TYPE)
+            offsets.append(position)
+            position = stop
+        self._calls = calls
+
+    def result(self, position):
+        """Returns whether the call recorded at position raised and its result."""
+        name_length, arguments_length, result_length = _HEADER.unpack_from(self._map, position)
+        start = position + _HEADER.size + name_length + arguments_length
+        return pickle.loads(self._map[start:start + result_length])
+
+
+class _ReplaySeq(_Sequence):
+    """The results recorded for one call, returned in turn with the last one repeated."""
+    __slots__ = ('_recording', '_offsets', '_next')
+
+    def __init__(self, recording, offsets):  #pylint: disable=super-init-not-called
+        self._recording = recording
+        self._offsets = offsets
+        self._next = 0
+
+    def __call__(self):
+        offsets = self._offsets
+        position = offsets[self._next]
+        if self._next < len(offsets) - 1:
+            self._next += 1
+        raised, result = self._recording.result(position)
+        if raised:
+            raise result
+        return result
+
+
+class _Replay(_Stub):
+    """A stub replaying a recording.
+
+    Calls are first looked up by their pickled arguments, which needs nothing from the recording to be unpickled.
+    Arguments that are equal but pickle differently, e.g. dicts built in a different order, fall back to the search
+    of a normal stub, for which the recorded arguments are unpickled once.
+    """
+    def __init__(self, recording, name, **options):
+        _Stub.__init__(self, **options)
+        self._options = options
+        self._recording = recording
+        self._name = name
+        self._calls = None
+        self._children = {}
+
+    def _replays(self):
+        if self._calls is None:
+            recording = self._recording
+            self._calls = OrderedDict((arguments, _ReplaySeq(recording, offsets))
+                                      for arguments, offsets in recording.calls(self._name).items())
+        return self._calls
+
+    def _lookup(self, k):
+        calls = self._replays()
+        args, kwargs = _split(k)
+        try:
+            obj = calls.get(_arguments_blob(args, kwargs))
+        except Exception:  #pylint: disable=broad-except
+            # e.g. an unpicklable argument, which can still be equal to a recorded one
+            obj = None
+        if obj is not None:
+            return obj
+        if len(self._results) != len(calls):
+            self._results[:] = [(self._call(arguments), obj) for arguments, obj in calls.items()]
+        return _Stub._lookup(self, k)
+
+    def _batch_lookup(self, k):
+        # recorded arguments are plain values, without predicates
+        return self._lookup(k), True
+
+    def _call(self, arguments):
+        args, kwargs = pickle.loads(arguments)
+        return call(*args, **dict(kwargs))
+
+    def method(self, name):
+        """Returns the stub replaying the recorded method of the given name, e.g. 'get' or 'prices.latest'.
+
+        Use it for methods whose names are also attributes of a stub, such as batch, which can't be replayed as
+        attributes.
+        """
+        child = self
+        for attr in name.split('.'):
+            child = child._child(attr)  #pylint: disable=protected-access
+        return child
+
+    def _child(self, attr):
+        child = self._children.get(attr)
+        if child is None:
+            child = _Replay(self._recording, self._name + '.' + attr if self._name else attr, **self._options)
+            # keep the child so its sequences carry on from one access to the next
+            child = self._children.setdefault(attr, child)
+        return child
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return self._child(attr)
+
+
+def replay(path, **options):
+    """Makes a stub that replays a recording made with record().
+
+    The stub returns the results recorded for each call and raises the exceptions, calls that were recorded more
+    than once return their results in turn with the last one repeated. The methods of a recorded object are
+    replayed by the attributes of the stub of the same name, which can be used as the side_effect of a mock to
+    verify the calls:
+
+    >>> prices = replay('prices.rec')
+    >>> client = Mock()
+    >>> client.get_price.side_effect = prices.get_price
+    >>> client.get_price('VOD.L', date(2015, 1, 2))
+    228.5
+
+    Methods whose names are also attributes of a stub, such as batch, are replayed by method(), e.g.
+    prices.method('batch'), which also takes dotted names such as 'prices.latest'.
+
+    The recording is memory mapped and indexed on the first call, and results are only unpickled when they are
+    returned, so large recordings are cheap to open. The options are the options of stub(), e.g. thread_safe.
+    """
+    return _Replay(_Recording(path), '', **options)
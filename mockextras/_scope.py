@@ -0,0 +1,49 @@
+# mockextras.scope
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+import threading
+
+
+# While a stub compares a call against its configuration, matchers can cache values computed from the arguments,
+# e.g. a content hash of a large argument, so they are computed at most once per call however many entries the
+# argument is compared against. The cache is per thread and is dropped when the lookup ends as the arguments may
+# be mutated between calls.
+_local = threading.local()
+
+
+def _begin():
+    """Starts a lookup scope, returning a token for _end. Nested lookups share the outermost scope."""
+    previous = getattr(_local, 'cache', None)
+    if previous is None:
+        _local.cache = {}
+    return previous
+
+
+def _end(previous):
+    _local.cache = previous
+
+
+def _cached(obj, tag, compute):
+    """Returns compute(obj), computed at most once per lookup for each object and tag.
+
+    Outside of a lookup compute(obj) is simply returned. The object is kept alive for the rest of the lookup so
+    that its id can't be reused.
+    """
+    cache = getattr(_local, 'cache', None)
+    if cache is None:
+        return compute(obj)
+    key = id(obj), tag
+    try:
+        return cache[key][1]
+    except KeyError:
+        value = compute(obj)
+        cache[key] = obj, value
+        return value
@@ -0,0 +1,144 @@
+# mockextras.seqfile
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+from ._compat import _is_exception
+from ._stub import _Sequence
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+import json
+import mmap
+
+__all__ = ['seq_from_file']
+
+
+def _is_exception_class(cls):
+    return isinstance(cls, type) and issubclass(cls, BaseException)
+
+
+def _exception_classes(exceptions):
+    """The exception classes records can name besides the builtin ones, by name."""
+    if hasattr(exceptions, 'items'):
+        classes = dict(exceptions)
+    else:
+        classes = {}
+        for cls in exceptions:
+            classes[cls.__name__] = cls
+            classes['%s.%s' % (cls.__module__, getattr(cls, '__qualname__', cls.__name__))] = cls
+    for name, cls in classes.items():
+        if not _is_exception_class(cls):
+            raise TypeError("%r given for %s is not an exception class" % (cls, name))
+    return classes
+
+
+def _exception(marker, key, classes):
+    """Makes the exception described by a record such as {"$raise": "KeyError", "args": ["VOD.L"]}.
+
+    Nothing is imported, the data file can only name builtin exceptions and the classes given.
+    """
+    name = marker[key]
+    cls = classes.get(name)
+    if cls is None and '.' not in name:
+        cls = getattr(builtins, name, None)
+    if not _is_exception_class(cls):
+        raise TypeError("%s is not a builtin exception or one of the exceptions given to seq_from_file" % name)
+    return cls(*marker.get('args', ()))
+
+
+class _FileSequence(_Sequence):
+    """The records of a line oriented file, decoded one at a time as they are returned.
+
+    The file is memory mapped and only a position in it is kept, so memory use doesn't grow with its length.
+    """
+    __slots__ = ('_path', '_map', '_position', '_decode', '_encoding', '_raise_key', '_exceptions')
+
+    def __init__(self, path, decode, encoding, raise_key, exceptions):  #pylint: disable=super-init-not-called
+        self._path = path
+        self._decode = decode
+        self._encoding = encoding
+        self._raise_key = raise_key
+        self._exceptions = exceptions
+        self._position = 0
+        with open(path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # an empty file can't be mapped
+                self._map = None
+        if self._map is not None and hasattr(self._map, 'madvise'):
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+
+    def _next_line(self):
+        data = self._map
+        while data is not None:
+            start = self._position
+            if start >= len(data):
+                self._map = None
+                data.close()
+                break
+            end = data.find(b'\n', start)
+            if end < 0:
+                end = len(data)
+            self._position = end + 1
+            line = data[start:end].rstrip(b'\r')
+            if line.strip():
+                return line
+        raise StopIteration
+
+    def __call__(self):
+        record = self._decode(self._next_line().decode(self._encoding))
+        key = self._raise_key
+        if key is not None and type(record) is dict and key in record:
+            record = _exception(record, key, self._exceptions)
+        if _is_exception(record):
+            raise record
+        return record
+
+    def __repr__(self):
+        return 'seq_from_file(%r)' % self._path
+
+
+def seq_from_file(path, decode=json.loads, encoding='utf-8', raise_key='$raise', exceptions=()):
+    """Used to define a sequence of return values for a stub read from a line oriented file, e.g. JSON lines:
+
+    >>> try:
+    ...     from unittest.mock call
+    ... except ImportError:
+    ...     from mock import call
+    >>>
+    >>> with open('prices.jsonl', 'w') as f:
+    ...     _ = f.write('{"price": 228.5}\\n{"$raise": "KeyError", "args": ["VOD.L"]}\\n{"price": 229.0}\\n')
+    >>> fn = stub((call("VOD.L"), seq_from_file('prices.jsonl')))
+    >>> fn("VOD.L")
+    {'price': 228.5}
+    >>> fn("VOD.L")
+    Traceback (most recent call last):
+    ...
+    KeyError: 'VOD.L'
+    >>> fn("VOD.L")
+    {'price': 229.0}
+
+    Each non-blank line is a record, decoded by decode when it is returned, by default as JSON. A record that is a
+    dict with a raise_key is raised, as the exception class it names, made with its "args". Pass raise_key=None to
+    return such records as they are. A decode function can also return exceptions, which are raised. Like seq(),
+    the sequence ends with StopIteration.
+
+    Reading a data file never imports the code it names: records can name a builtin exception, or one of the
+    exceptions, given as classes, which can be named by their class name or their dotted path such as
+    "requests.exceptions.Timeout", or as a dict from the names used in the file to classes. Any other name raises a
+    TypeError when its record is reached.
+
+    The file is memory mapped and read one record at a time, so a sequence of a multi gigabyte file starts
+    immediately. Only the position of the next record is kept and the pages read are backed by the file, which the
+    operating system can drop, so memory use doesn't grow however many records are used.
+    """
+    return _FileSequence(path, decode, encoding, raise_key, _exception_classes(exceptions))
@@ -0,0 +1,167 @@
+# mockextras.stats
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+from ._matchers import _Matcher
+import os
+import sys
+import threading
+
+__all__ = ['collect_stats', 'reset_stats', 'stats_report', 'StubStats', 'EntryStats']
+
+
+# The stats of every stub made while collecting, so they can be reported after the stubs are gone
+_collected = []
+_collecting = [False]
+
+_PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def collect_stats(enabled=True):
+    """Turns on (or off) collecting statistics for the stubs made from now on, as if made with stats=True."""
+    _collecting[0] = enabled
+
+
+def reset_stats():
+    """Forgets the statistics of the stubs made so far."""
+    del _collected[:]
+
+
+def _collecting_by_default():
+    return _collecting[0]
+
+
+def _caller():
+    """The file and line of the first frame outside of mockextras, where a stub is being made."""
+    frame = sys._getframe(1)  #pylint: disable=protected-access
+    while frame is not None and os.path.dirname(os.path.abspath(frame.f_code.co_filename)) == _PACKAGE_DIRECTORY:
+        frame = frame.f_back
+    if frame is None:
+        return '<unknown>'
+    return '%s:%d' % (os.path.relpath(frame.f_code.co_filename), frame.f_lineno)
+
+
+class EntryStats(object):
+    """The statistics of one configured call of a stub."""
+    __slots__ = ('key', 'hits', 'misses', 'depth', 'seconds')
+
+    def __init__(self, key):
+        self.key = key
+        self.hits = 0
+        self.misses = 0
+        self.depth = 0
+        self.seconds = 0.0
+
+    @property
+    def average_depth(self):
+        """The average number of entries compared before this one matched."""
+        return self.depth / float(self.hits) if self.hits else None
+
+    def __repr__(self):
+        return 'EntryStats(%s, hits=%d, misses=%d, average_depth=%r, seconds=%r)' % (
+            self.key, self.hits, self.misses, self.average_depth, self.seconds)
+
+
+class StubStats(object):
+    """The statistics of a stub made with stats=True.
+
+    For each configured call it counts the calls it matched (hits), the calls it was compared with but didn't match
+    (misses), the number of entries compared before it matched and the time spent comparing it, which is the time
+    spent in the __eq__ of its matchers and in their such_that predicates.
+    """
+    def __init__(self, label):
+        self.label = label
+        self.calls = 0
+        self.unmatched = 0
+        # by position, only the configured calls are kept so the stats don't keep the results of the stub alive
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def compared(self, position, key, seconds, matched, depth):
+        with self._lock:
+            entry = self._entries.get(position)
+            if entry is None:
+                entry = self._entries[position] = EntryStats(key)
+            entry.seconds += seconds
+            if matched:
+                self.calls += 1
+                entry.hits += 1
+                entry.depth += depth
+            else:
+                entry.misses += 1
+
+    def unmatched_call(self):
+        with self._lock:
+            self.calls += 1
+            self.unmatched += 1
+
+    def entries(self):
+        """Returns the EntryStats of the configured calls that were compared, in configuration order."""
+        entries = self._entries
+        return [entries[position] for position in sorted(entries)]
+
+    @property
+    def seconds(self):
+        return sum(entry.seconds for entry in self._entries.values())
+
+    @property
+    def comparisons(self):
+        return sum(entry.hits + entry.misses for entry in self._entries.values())
+
+    def __repr__(self):
+        return 'StubStats(%s, calls=%d, unmatched=%d, comparisons=%d, seconds=%r)' % (
+            self.label, self.calls, self.unmatched, self.comparisons, self.seconds)
+
+
+def _new_stats():
+    stats = StubStats(_caller())
+    _collected.append(stats)
+    return stats
+
+
+def _matchers_of(key):
+    try:
+        _, args, kwargs = key
+    except (TypeError, ValueError):
+        return [key] if isinstance(key, _Matcher) else []
+    return [arg for arg in tuple(args) + tuple(kwargs.values()) if isinstance(arg, _Matcher)]
+
+
+def stats_report(top=10, stubs=None):
+    """Returns a report of the stubs that spent the most time matching calls, and of the matchers they spent it in.
+
+    Reports on the stubs made while collecting stats, or on the given StubStats. The time of a matcher is the time
+    spent comparing the configured calls that use it.
+    """
+    stubs = [stats for stats in (_collected if stubs is None else stubs) if stats.calls]
+    if not stubs:
+        return 'No stub statistics were collected'
+    lines = ['Slowest stubs:',
+             '%10s %8s %10s %12s  %s' % ('time (ms)', 'calls', 'unmatched', 'comparisons', 'made at')]
+    matchers = {}
+    for stats in sorted(stubs, key=lambda s: -s.seconds)[:top]:
+        lines.append('%10.3f %8d %10d %12d  %s' % (stats.seconds * 1000, stats.calls, stats.unmatched,
+                                                   stats.comparisons, stats.label))
+        entries = sorted(stats.entries(), key=lambda e: -e.seconds)
+        for entry in entries[:3]:
+            depth = entry.average_depth
+            lines.append('%10.3f %8d %10d %12s    %s' % (entry.seconds * 1000, entry.hits, entry.misses,
+                                                         '' if depth is None else 'depth %.1f' % depth, entry.key))
+    for stats in stubs:
+        for entry in stats.entries():
+            for matcher in _matchers_of(entry.key):
+                name = repr(matcher)
+                seconds, comparisons = matchers.get(name, (0.0, 0))
+                matchers[name] = seconds + entry.seconds, comparisons + entry.hits + entry.misses
+    if matchers:
+        lines += ['', 'Slowest matchers:', '%10s %12s  %s' % ('time (ms)', 'comparisons', 'matcher')]
+        for name, (seconds, comparisons) in sorted(matchers.items(), key=lambda item: -item[1][0])[:top]:
+            lines.append('%10.3f %12d  %s' % (seconds * 1000, comparisons, name))
+    return '\n'.join(lines)
@@ -9,21 +9,29 @@
 # Released subject to the BSD License
 # Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
 
+from ._adaptive import _HotEntries, _comparable_split
+from ._index import _StubIndex, _has_predicates, _is_pure, _split, _typed_signature
+from ._latency import _Delayed
 from ._matchers import __all__ as matchers_all
+from ._scope import _begin, _end
+from ._stats import _collecting_by_default, _new_stats
+from ._compat import _Call, _is_exception, call
+from collections import OrderedDict
+from os import linesep
+import heapq
+import threading
 try:
-    from unittest.mock import _is_exception, call
+    from time import perf_counter as _clock
 except ImportError:
-    try:
-        from mock.mock import call, _is_exception 
-    except ImportError:
-        from mock import call, _is_exception
-from os import linesep
+    from time import time as _clock
 
 
 __all__ = ['seq', 'stub', 'UnexpectedStubCall']
 
 
 class _Sequence(object):
+    __slots__ = ('_iterator',)
+
     def __init__(self, iterable):
         self._iterator = iter(iterable)
 
@@ -65,44 +73,423 @@ def seq(iterable):
     return _Sequence(iterable)
 
 
-class UnexpectedStubCall(Exception):
-    pass
-
-
 def _one_per_line_indented(results, indent=4):
     return ("""
 """ + " " * indent).join(str(k) for k, _ in results)
 
 
-class _Stub(object):
-    def __init__(self, *args):
-        self._results = tuple((conf[0], seq(conf[1:])) if len(conf) > 2 else conf for conf in args)
+def _arg_similarity(arg, configured):
+    if _has_predicates(configured):
+        # rendering a message mustn't run user predicates, which may have side effects
+        return 1
+    try:
+        if configured == arg or arg == configured:
+            return 3
+    except Exception:  #pylint: disable=broad-except
+        pass
+    return 1 if type(configured) is type(arg) else 0
+
+
+def _similarity(k, key):
+    """Scores how close a configured call is to an attempted one, the higher the closer."""
+    split, configured_split = _split(k), _split(key)
+    if split is None or configured_split is None:
+        return 0
+    (args, kwargs), (configured_args, configured_kwargs) = split, configured_split
+    score = (len(args) == len(configured_args)) + (set(kwargs) == set(configured_kwargs))
+    score += sum(_arg_similarity(a, c) for a, c in zip(args, configured_args))
+    score += sum(_arg_similarity(kwargs[name], configured_kwargs[name])
+                 for name in set(kwargs).intersection(configured_kwargs))
+    return score
 
-    def _lookup(self, k):
-        for key, value in self._results:
-            # Some classes don't play by the rules so try the equals both ways around
-            if key == k or k == key:
-                return value
-        if self._results:
-            raise UnexpectedStubCall("""Unexpected stub call:
+
+class UnexpectedStubCall(Exception):
+    """Raised when a stub is called with arguments that don't match any of its configured calls.
+
+    The attempted call is available as the call attribute and the stub's configuration as configured. The message
+    is only rendered when the exception is displayed or its args are read, and for large stubs it only lists the
+    max_listed configured calls that are closest to the attempted one, ranked without running any predicates.
+    """
+    max_listed = 10
+
+    def __init__(self, *args, **kwargs):
+        self.call = kwargs.pop('call', None)
+        configured = kwargs.pop('configured', None)
+        if kwargs:
+            raise TypeError("Unexpected keyword arguments: %s" % ', '.join(sorted(kwargs)))
+        self._structured = configured is not None
+        Exception.__init__(self, *args)
+        # The configuration of a stub can grow after the call, only report what was there at the time
+        self._count = len(configured) if self._structured else 0
+        self.configured = configured
+
+    def closest(self, n=None):
+        """Returns up to n (default max_listed) configured entries, the closest to the attempted call first."""
+        n = self.max_listed if n is None else n
+        entries = self.configured[:self._count]
+        if len(entries) <= n:
+            return list(entries)
+        ranked = heapq.nsmallest(n, range(len(entries)),
+                                 key=lambda position: (-_similarity(self.call, entries[position][0]), position))
+        return [entries[position] for position in ranked]
+
+    def __str__(self):
+        if not self._structured:
+            return Exception.__str__(self)
+        if not self._count:
+            return "Unexpected call of an unconfigured stub"
+        closest = self.closest()
+        if len(closest) == self._count:
+            heading = "The following calls are configured:"
+        else:
+            heading = "The %d closest of the %d configured calls are:" % (len(closest), self._count)
+        return """Unexpected stub call:
     %s
-The following calls are configured:
+%s
     %s
-""" % (k, _one_per_line_indented(self._results)))
+""" % (self.call, heading, _one_per_line_indented(closest))
+
+    @property
+    def args(self):
+        args = Exception.args.__get__(self)
+        if self._structured and not args:
+            # as if the message had been passed in, it's only rendered when asked for
+            return (str(self),)
+        return args
+
+    @args.setter
+    def args(self, value):
+        Exception.args.__set__(self, value)
+
+    def __repr__(self):
+        if not self._structured:
+            return Exception.__repr__(self)
+        return '%s(%r)' % (type(self).__name__, str(self))
+
+    def __reduce__(self):
+        # the configured calls can't be pickled, a copy, e.g. in another process, only carries the message
+        if not self._structured:
+            return Exception.__reduce__(self)
+        return type(self), (str(self),)
+
+
+def _call_arguments(item):
+    """Returns the args and kwargs of an item of a batch, a call() or a tuple of positional arguments."""
+    if isinstance(item, _Call):
+        if len(item) == 2:
+            return item
+        name, args, kwargs = item
+        if name:
+            raise TypeError("A stub can't be called as %s" % (item,))
+        return args, kwargs
+    return tuple(item), {}
+
+
+def _column_arguments(columns, keyword_columns):
+    """Yields the args and kwargs of each row of a columnar batch."""
+    # e.g. numpy arrays and pandas series, whose items would otherwise be numpy scalars
+    columns = [getattr(column, 'tolist', lambda column=column: column)() for column in columns]
+    names = sorted(keyword_columns)
+    columns += [getattr(keyword_columns[name], 'tolist', lambda name=name: keyword_columns[name])()
+                for name in names]
+    lengths = set(len(column) for column in columns)
+    if len(lengths) > 1:
+        raise ValueError("The columns of a batch must all be the same length, not %s" % sorted(lengths))
+    n = len(columns) - len(names)
+    for row in zip(*columns):
+        yield row[:n], dict(zip(names, row[n:]))
+
+
+class _Stub(object):
+    # Below this many entries a plain scan is cheaper than maintaining the index
+    _INDEX_MIN_SIZE = 8
+
+    def __init__(self, *args, **options):
+        self._results = [(conf[0], seq(conf[1:])) if len(conf) > 2 else conf for conf in args]
+        self._index = _StubIndex()
+        self._cache_size = options.pop('cache_size', None)
+        self._cache_predicates = options.pop('cache_predicates', False)
+        thread_safe = options.pop('thread_safe', False)
+        stats = options.pop('stats', None)
+        adaptive = options.pop('adaptive', False)
+        if options:
+            raise TypeError("Unexpected stub options: %s" % ', '.join(sorted(options)))
+        self._cache = OrderedDict() if self._cache_size else None
+        self._cached_size = 0
+        self._purity = {}
+        # In thread safe mode the configuration is read without locking, _lock only guards updates to the index
+        # and the cache, and each sequence gets a lock of its own so that only calls to the same entry contend.
+        self._lock = threading.Lock() if thread_safe else None
+        self._sequence_locks = {} if thread_safe else None
+        if stats is None:
+            stats = _collecting_by_default()
+        self._stats = _new_stats() if stats else None
+        self._hot = _HotEntries() if adaptive else None
+
+    def _candidates(self, k):
+        results = self._results
+        if len(results) < self._INDEX_MIN_SIZE:
+            return range(len(results))
+        if not self._index.is_synced(results):
+            if self._lock is None:
+                self._index.sync(results)
+            else:
+                with self._lock:
+                    self._index.sync(results)
+        return self._index.candidates(results, k)
+
+    def _is_pure(self, position):
+        purity = self._purity.get(position)
+        if purity is None:
+            purity = self._purity[position] = _is_pure(self._results[position][0])
+        return purity
+
+    def _cache_get(self, sig):
+        cache, results = self._cache, self._results
+        if self._cached_size != len(results):
+            # the configuration has changed, e.g. CalledWith.then added an entry
+            cache.clear()
+            self._purity.clear()
+            self._cached_size = len(results)
+        if sig is not None and sig in cache:
+            position = cache[sig] = cache.pop(sig)
+            return position
+        return None
+
+    def _cache_put(self, sig, position):
+        cache = self._cache
+        cache[sig] = position
+        if len(cache) > self._cache_size:
+            cache.popitem(last=False)
+
+    def _still_cacheable(self, position):
+        if self._cache_predicates:
+            return True
+        if self._lock is None:
+            return self._is_pure(position)
+        with self._lock:
+            return self._is_pure(position)
+
+    def _scan(self, k, cacheable, skip=()):
+        """Returns the position of the first entry matching k, or None, and whether the match can be cached.
+
+        The entries in skip are known not to match.
+        """
+        results = self._results
+        for position in self._candidates(k):
+            if skip and position in skip:
+                continue
+            key = results[position][0]
+            if cacheable:
+                cacheable = self._still_cacheable(position)
+            # Some classes don't play by the rules so try the equals both ways around
+            if key == k or k == key:
+                return position, cacheable
+        return None, cacheable
+
+    def _profiled_scan(self, k, cacheable, skip=()):
+        """_scan, recording the time spent comparing each entry."""
+        results, stats = self._results, self._stats
+        depth = 0
+        for position in self._candidates(k):
+            if skip and position in skip:
+                continue
+            key = results[position][0]
+            if cacheable:
+                cacheable = self._still_cacheable(position)
+            start = _clock()
+            matched = key == k or k == key
+            stats.compared(position, key, _clock() - start, matched, depth)
+            if matched:
+                return position, cacheable
+            depth += 1
+        stats.unmatched_call()
+        return None, cacheable
+
+    def _promoted(self, args, kwargs, promoted):
+        """Returns the position of the promoted entry matching the arguments, or None."""
+        results, stats = self._results, self._stats
+        # the arguments are all plain or builtin containers, they compare the same way round as the call would
+        for depth, (position, key_args, key_kwargs) in enumerate(promoted):
+            if stats is None:
+                matched = key_args == args and key_kwargs == kwargs
+            else:
+                start = _clock()
+                matched = key_args == args and key_kwargs == kwargs
+                stats.compared(position, results[position][0], _clock() - start, matched, depth)
+            if matched:
+                return position
+        return None
+
+    def _hit(self, position):
+        if self._lock is None:
+            self._hot.hit(self._results, position)
         else:
-            raise UnexpectedStubCall("Unexpected call of an unconfigured stub")
+            with self._lock:
+                self._hot.hit(self._results, position)
+
+    def _lookup(self, k):
+        return self._results[self._position(k, self._cache is not None)[0]][1]
+
+    def _position(self, k, cacheable):
+        """Returns the position of the entry matching k, raising UnexpectedStubCall if there is none, and whether
+        calls with the same arguments always match it, which is only worked out if cacheable is true."""
+        results = self._results
+        lock = self._lock
+        sig = None
+        if self._cache is not None:
+            split = _split(k)
+            sig = _typed_signature(*split) if split is not None else None
+            cacheable = cacheable and sig is not None
+            if lock is None:
+                position = self._cache_get(sig)
+            else:
+                with lock:
+                    position = self._cache_get(sig)
+            if position is not None:
+                if self._stats is not None:
+                    self._stats.compared(position, results[position][0], 0.0, True, 0)
+                return position, True
+
+        scope = _begin()
+        try:
+            skip = ()
+            promoted = self._hot.entries(results) if self._hot is not None else ()
+            split = _comparable_split(k) if promoted else None
+            if split is not None:
+                position = self._promoted(split[0], split[1], promoted)
+                if position is not None:
+                    self._hit(position)
+                    # the entries before a promoted one can't match the same calls, only its own predicates run
+                    return position, cacheable and self._still_cacheable(position)
+                skip = set(position for position, _, _ in promoted)
+                cacheable = cacheable and all(self._still_cacheable(position) for position in skip)
+            scan = self._scan if self._stats is None else self._profiled_scan
+            position, cacheable = scan(k, cacheable, skip)
+        finally:
+            _end(scope)
+        if position is None:
+            raise UnexpectedStubCall(call=k, configured=self._results)
+        if self._hot is not None:
+            self._hit(position)
+        if cacheable and sig is not None:
+            if lock is None:
+                self._cache_put(sig, position)
+            else:
+                with lock:
+                    self._cache_put(sig, position)
+        return position, cacheable
+
+    def _sequence_lock(self, obj):
+        locks = self._sequence_locks
+        lock = locks.get(id(obj))
+        if lock is None:
+            lock = locks.setdefault(id(obj), threading.Lock())
+        return lock
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # locks can't be pickled, only whether the stub is thread safe is kept
+        state['_lock'] = self._lock is not None
+        state['_sequence_locks'] = None
+        state['_stats'] = None
+        if self._cache is not None:
+            state['_cache'] = OrderedDict()
+            state['_cached_size'] = 0
+        return state
+
+    def __setstate__(self, state):
+        thread_safe = state['_lock']
+        self.__dict__.update(state)
+        self._lock = threading.Lock() if thread_safe else None
+        self._sequence_locks = {} if thread_safe else None
+        # stats belong to the stub that collected them, a copy collects its own if stats are being collected
+        self._stats = _new_stats() if _collecting_by_default() else None
+
+    def call_stats(self):
+        """Returns the StubStats of a stub made with stats=True, or None."""
+        return self._stats
+
+    def latency_stats(self):
+        """Returns (call, LatencyStats) for each delayed entry, in configuration order."""
+        return [(key, value.stats) for key, value in self._results if type(value) is _Delayed]
 
     def __call__(self, *args, **kwargs):
-        obj = self._lookup(call(*args, **kwargs))
+        return self._result(self._lookup(call(*args, **kwargs)))
+
+    def _result(self, obj):
+        if type(obj) is _Delayed:
+            seconds, timed_out = obj.sample()
+            obj.latency.clock.sleep(seconds)
+            if timed_out:
+                raise obj.latency.timeout_error()
+            obj = obj.result
+        return self._take(obj)
+
+    def batch(self, calls):
+        """Calls the stub with each item of calls, a call() or a tuple of positional arguments, and returns the
+        list of results. An exception raised by a call takes the place of its result."""
+        return self._batch(_call_arguments(item) for item in calls)
+
+    def batch_columns(self, *columns, **keyword_columns):
+        """Calls the stub once per row of the columns, which are the positional and keyword arguments of the calls,
+        and returns the list of results. An exception raised by a call takes the place of its result."""
+        return self._batch(_column_arguments(columns, keyword_columns))
+
+    def _batch(self, arguments):
+        results = []
+        append = results.append
+        for found, obj in self._batch_lookups(arguments):
+            if not found:
+                append(obj)
+                continue
+            try:
+                append(self._result(obj))
+            except Exception as err:  #pylint: disable=broad-except
+                append(err)
+        return results
+
+    def _batch_lookups(self, arguments):
+        """Yields, for the args and kwargs of each call of a batch, whether its configured result was found and
+        the result or the exception raised looking it up.
+
+        The calls of a batch with the same plain arguments are only looked up once, unless the entry they match
+        runs predicates, which might not give the same answer every time, as for the cache.
+        """
+        looked_up = {}
+        for args, kwargs in arguments:
+            sig = _typed_signature(args, kwargs)
+            lookup = looked_up.get(sig) if sig is not None else None
+            if lookup is None:
+                reusable = True
+                try:
+                    obj, reusable = self._batch_lookup(call(*args, **kwargs))
+                    lookup = True, obj
+                except Exception as err:  #pylint: disable=broad-except
+                    lookup = False, err
+                if sig is not None and reusable:
+                    looked_up[sig] = lookup
+            yield lookup
+
+    def _batch_lookup(self, k):
+        """Returns the configured result for k and whether calls with the same arguments get the same one."""
+        position, reusable = self._position(k, True)
+        return self._results[position][1], reusable
+
+    def _take(self, obj):
+        """Returns the configured result, raising it if it is an exception and advancing it if it is a sequence."""
         if _is_exception(obj):
             raise obj
         if isinstance(obj, _Sequence):
+            if self._sequence_locks is not None:
+                with self._sequence_lock(obj):
+                    return obj()
             return obj()
         return obj
 
 
-def stub(*args):
-    return _Stub(*args)
+def stub(*args, **options):
+    return _Stub(*args, **options)
 
 
 stub.__doc__ = """Makes stubs that can be used stand-alone or with mock.
@@ -191,6 +578,55 @@ For example:
 >>> fn(100, { "key" : 1000 })
 'hello'
 
+A stub that is called with the same arguments over and over again can remember which of its configured calls
+they matched, so repeated calls skip the search:
+
+>>> fn = stub((call(100, 200),   "monkey"),
+...           (call(100, Any()), "hello"),
+...           cache_size=1000)
+>>> fn(100, 300)
+'hello'
+>>> fn(100, 300)
+'hello'
+
+Up to cache_size calls are remembered, least recently used first out. Only calls whose arguments are all plain
+hashable values are cached and the cache is cleared whenever the stub's configuration changes. Calls matched
+using a matcher with such_that predicates, or an object with its own __eq__ such as a hamcrest matcher, aren't
+cached as they would no longer be run on every call, pass cache_predicates=True if they have no side effects.
+
+To find out which stubs slow a test suite down, make them with stats=True, or call collect_stats() before they
+are made. Each entry of the stub then counts its hits and misses, how deep in the configuration it matched and
+the time spent comparing it, see call_stats() and stats_report(). Calls answered from the cache count as hits
+that took no time.
+
+A large stub whose calls mostly match a few entries configured far down its configuration can be made with
+adaptive=True. The entries that are hit most often are then compared first, as long as no entry configured
+before them could match the same calls: they must differ from each earlier entry in the number of arguments, in a
+plain value, or by matching only values of unrelated types, e.g. Any(int) and Any(str). Entries that could overlap
+are still compared in configuration order, so the first configured match always wins. Calls with arguments that
+aren't plain values or builtin containers, e.g. matchers, always use the normal search.
+
+A stub can be called with a whole batch of calls at once, each a call() or a tuple of positional arguments,
+or with columns of arguments, such as lists, numpy arrays or pandas series:
+
+>>> fn = stub((call(1), "one"),
+...           (call(2), 2, 4, 8),
+...           (call(x=3), KeyError(3)))
+>>> fn.batch([(1,), (2,), call(x=3), (2,)])
+['one', 2, KeyError(3), 4]
+>>> fn.batch_columns([1, 2, 1])
+['one', 8, 'one']
+
+The results come back as a list, in order, with the exception raised by a call in place of its result so one
+failing call doesn't abort the batch. Calls with the same plain arguments are only looked up once per batch and
+sequences are advanced in the order of the calls. Calls made through batch() aren't seen by a mock the stub is the
+side_effect of.
+
+A stub can be shared between threads, e.g. by code under test that uses a thread pool, by passing
+thread_safe=True. Lookups then take no lock, each sequence hands out every value exactly once and entries can be
+added with when() while other threads are calling the stub. Without it sequences may lose or repeat values when
+they are consumed concurrently.
+
 The following matchers are available in mockextras:
 %s
 
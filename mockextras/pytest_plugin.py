@@ -0,0 +1,40 @@
+# mockextras.pytest_plugin
+# Matchers and Stubs for mock.
+# Copyright (C) 2012-2015 Man AHL
+# E-mail: ManAHLTech AT ahl DOT com
+
+# mockextras 1.0.0
+# https://github.com/manahl/mockextras
+
+# Released subject to the BSD License
+# Please see https://github.com/manahl/mockextras/blob/master/LICENSE.txt
+
+"""A pytest plugin that reports the stubs that slow a test run down.
+
+Run pytest with --mockextras-stats to collect statistics for every stub made during the run and print the
+slowest stubs and matchers at the end. The plugin is registered when mockextras is installed, or can be loaded
+with -p mockextras.pytest_plugin.
+"""
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('mockextras')
+    group.addoption('--mockextras-stats', action='store_true', default=False,
+                    help='collect statistics for every stub and report the slowest ones')
+    group.addoption('--mockextras-stats-top', type=int, default=10, metavar='N',
+                    help='the number of stubs and matchers to report (default: %(default)s)')
+
+
+def pytest_configure(config):
+    if config.getoption('mockextras_stats'):
+        from mockextras._stats import collect_stats
+        collect_stats()
+
+
+def pytest_terminal_summary(terminalreporter, config=None):
+    config = config or terminalreporter.config
+    if not config.getoption('mockextras_stats'):
+        return
+    from mockextras._stats import stats_report
+    terminalreporter.write_sep('=', 'mockextras stub statistics')
+    terminalreporter.write_line(stats_report(top=config.getoption('mockextras_stats_top')))
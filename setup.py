@@ -50,6 +50,7 @@ and the source is here: http://github.com/manahl/mockextras""",
         from distutils.core import setup
     else:
         params['install_requires'] = []
+        params['entry_points'] = {'pytest11': ['mockextras = mockextras.pytest_plugin']}
 
     try:
         from unittest import mock
@@ -0,0 +1,99 @@
+from mockextras import stub, ArrayEqual, ArrayClose, Any
+from mockextras import _arrays
+try:
+    from unittest.mock import call
+except ImportError:
+    from mock import call
+import copy
+import pickle
+import sys
+import pytest
+
+
+def test_array_matchers_require_numpy(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'numpy', None)
+
+    with pytest.raises(ImportError):
+        ArrayEqual([1, 2, 3])
+    with pytest.raises(ImportError):
+        ArrayClose([1, 2, 3])
+
+
+def test_array_equal_equality():
+    np = pytest.importorskip('numpy')
+
+    assert ArrayEqual([1, 2, 3]) == np.array([1, 2, 3])
+    assert np.array([1, 2, 3]) == ArrayEqual([1, 2, 3])
+    assert ArrayEqual([1, 2, 3]) != np.array([1, 2, 4])
+    assert np.array([1, 2, 4]) != ArrayEqual([1, 2, 3])
+    assert ArrayEqual([1, 2, 3]) != np.array([1, 2])
+    assert ArrayEqual([1, 2, 3]) != np.array([[1, 2, 3]])
+    assert ArrayEqual([1, 2, 3]) != [1, 2, 3]
+    assert ArrayEqual([1, 2, 3]) != np.array([1., 2., 3.])
+    assert ArrayEqual([1, 2, 3], check_dtype=False) == np.array([1., 2., 3.])
+    assert ArrayEqual([1., np.nan]) != np.array([1., np.nan])
+    assert ArrayEqual([1., np.nan], equal_nan=True) == np.array([1., np.nan])
+
+
+def test_array_equal_large_arrays(monkeypatch):
+    np = pytest.importorskip('numpy')
+    monkeypatch.setattr(_arrays, '_CHUNK_SIZE', 10)
+
+    expected = np.arange(1000).reshape(10, 100)
+    assert ArrayEqual(expected) == expected.copy()
+    different = expected.copy()
+    different[9, 99] = -1
+    assert ArrayEqual(expected) != different
+    assert ArrayEqual(expected) == np.asfortranarray(expected)
+
+
+def test_array_close_equality():
+    np = pytest.importorskip('numpy')
+
+    assert ArrayClose([1., 2.]) == np.array([1., 2.000000001])
+    assert ArrayClose([1., 2.]) != np.array([1., 2.1])
+    assert ArrayClose([1., 2.], atol=0.2) == np.array([1., 2.1])
+    assert ArrayClose([100., 200.], rtol=0.01) == np.array([101., 198.])
+    assert ArrayClose([1., 2.]) == np.array([1, 2])
+    assert ArrayClose([1., 2.]) != np.array(['1', '2'])
+    assert ArrayClose([1., 2.]) != np.array([1., 2., 3.])
+    assert ArrayClose([1., np.nan]) != np.array([1., np.nan])
+    assert ArrayClose([1., np.nan], equal_nan=True) == np.array([1., np.nan])
+
+
+def test_array_close_large_arrays(monkeypatch):
+    np = pytest.importorskip('numpy')
+    monkeypatch.setattr(_arrays, '_CHUNK_SIZE', 10)
+
+    expected = np.linspace(0, 1, 1000)
+    assert ArrayClose(expected) == expected + 1e-10
+    different = expected.copy()
+    different[-1] += 0.1
+    assert ArrayClose(expected) != different
+
+
+def test_array_matchers_in_stub():
+    np = pytest.importorskip('numpy')
+
+    fn = stub((call(ArrayEqual([1, 2, 3])), 'first'),
+              (call(ArrayClose([4., 5.]), Any()), 'second'))
+
+    assert fn(np.array([1, 2, 3])) == 'first'
+    assert fn(np.array([4., 5.]), 'x') == 'second'
+
+
+def test_pretty_print_array_matchers():
+    pytest.importorskip('numpy')
+
+    assert repr(ArrayEqual([1, 2])) == "ArrayEqual(array([1, 2]))"
+    assert repr(ArrayClose([1., 2.])) == "ArrayClose(array([1., 2.]), rtol=1e-05, atol=1e-08)"
+
+
+def test_array_matchers_can_be_pickled_and_copied():
+    np = pytest.importorskip('numpy')
+
+    for matcher in (ArrayEqual([1, 2, 3]), ArrayClose([1., 2.], atol=0.2)):
+        for copied in (pickle.loads(pickle.dumps(matcher)), copy.deepcopy(matcher)):
+            assert repr(copied) == repr(matcher)
+            assert copied == np.array(matcher._expected)
+            assert copied != np.array([7, 8, 9])
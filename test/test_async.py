@@ -0,0 +1,174 @@
+from mockextras import when, stub, UnexpectedStubCall
+import mockextras
+try:
+    from unittest.mock import Mock, sentinel, call
+except ImportError:
+    from mock import Mock, sentinel, call
+import functools
+import pytest
+
+asyncio = pytest.importorskip('asyncio')
+async_stub = getattr(mockextras, 'async_stub', None)
+try:
+    from unittest.mock import AsyncMock
+except ImportError:
+    AsyncMock = None
+
+pytestmark = pytest.mark.skipif(async_stub is None or AsyncMock is None, reason='requires AsyncMock')
+
+
+def _run(awaitable):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(awaitable)
+    finally:
+        loop.close()
+
+
+def _run_concurrently(awaitables):
+    loop = asyncio.new_event_loop()
+    try:
+        tasks = [loop.create_task(awaitable) for awaitable in awaitables]
+        loop.run_until_complete(asyncio.wait(tasks))
+        return [task.result() for task in tasks]
+    finally:
+        loop.close()
+
+
+def _later(value):
+    """A coroutine factory resolving to value once the event loop has run other tasks."""
+    return functools.partial(asyncio.sleep, 0, value)
+
+
+def test_when_with_async_mock():
+    mock_fn = AsyncMock()
+    when(mock_fn).called_with(sentinel.arg).then(sentinel.result)
+
+    assert _run(mock_fn(sentinel.arg)) == sentinel.result
+    mock_fn.assert_awaited_once_with(sentinel.arg)
+
+
+def test_when_with_async_mock_and_coroutine_factory():
+    mock_fn = AsyncMock()
+    when(mock_fn).called_with(sentinel.arg).then(_later(sentinel.first)).then(_later(sentinel.last))
+
+    assert _run(mock_fn(sentinel.arg)) == sentinel.first
+    assert _run(mock_fn(sentinel.arg)) == sentinel.last
+    # a factory makes a new coroutine each time so the last result can be repeated
+    assert _run(mock_fn(sentinel.arg)) == sentinel.last
+
+
+def test_when_with_async_mock_and_awaitable():
+    loop = asyncio.new_event_loop()
+    try:
+        future = loop.create_future()
+        loop.call_soon(future.set_result, sentinel.result)
+        mock_fn = AsyncMock()
+        when(mock_fn).called_with(sentinel.arg).then(future)
+
+        assert loop.run_until_complete(mock_fn(sentinel.arg)) == sentinel.result
+    finally:
+        loop.close()
+
+
+def test_when_with_async_mock_and_exception():
+    mock_fn = AsyncMock()
+    when(mock_fn).called_with(sentinel.arg).then(ValueError('boom'))
+
+    with pytest.raises(ValueError):
+        _run(mock_fn(sentinel.arg))
+
+
+def test_when_with_async_mock_and_unexpected_call():
+    mock_fn = AsyncMock()
+    when(mock_fn).called_with(sentinel.arg).then(sentinel.result)
+
+    with pytest.raises(UnexpectedStubCall):
+        _run(mock_fn(sentinel.other))
+
+
+def test_when_with_mock_is_still_synchronous():
+    mock_fn = Mock()
+    when(mock_fn).called_with(sentinel.arg).then(sentinel.result)
+
+    assert mock_fn(sentinel.arg) == sentinel.result
+
+
+def test_async_stub():
+    fn = async_stub((call(1), 'one'),
+                    (call(2), _later('two')),
+                    (call(3), 'a', _later('b'), KeyError('c')))
+
+    assert _run(fn(1)) == 'one'
+    assert _run(fn(2)) == 'two'
+    assert _run(fn(3)) == 'a'
+    assert _run(fn(3)) == 'b'
+    with pytest.raises(KeyError):
+        _run(fn(3))
+
+
+def test_async_stub_batch():
+    fn = async_stub((call(1), 'one'),
+                    (call(3), 'a', _later('b'), KeyError('c')))
+
+    results = _run(fn.batch([(3,), (1,), (3,), (2,), (3,)]))
+
+    assert results[:3] == ['a', 'one', 'b']
+    assert isinstance(results[3], UnexpectedStubCall)
+    assert isinstance(results[4], KeyError)
+
+
+def test_async_stub_as_side_effect():
+    mock_fn = AsyncMock(side_effect=async_stub((call(sentinel.arg), _later(sentinel.result))))
+
+    assert _run(mock_fn(sentinel.arg)) == sentinel.result
+
+
+def test_sync_stub_as_side_effect_of_async_mock():
+    mock_fn = AsyncMock(side_effect=stub((call(sentinel.arg), sentinel.result)))
+
+    assert _run(mock_fn(sentinel.arg)) == sentinel.result
+
+
+def test_async_stub_with_concurrent_tasks():
+    mock_fn = AsyncMock()
+    called_with = when(mock_fn).called_with(sentinel.arg)
+    for i in range(1000):
+        called_with.then(_later(i))
+
+    results = _run_concurrently([mock_fn(sentinel.arg) for _ in range(1000)])
+
+    assert sorted(results) == list(range(1000))
+
+
+def test_async_latency_on_virtual_clock_runs_in_parallel():
+    from mockextras import Latency, VirtualClock
+    clock = VirtualClock()
+    mock_fn = AsyncMock()
+    when(mock_fn).called_with(sentinel.slow).then(sentinel.slow, latency=Latency(3, clock=clock))
+    when(mock_fn).called_with(sentinel.fast).then(sentinel.fast, latency=Latency(1, clock=clock))
+
+    results = _run_concurrently([mock_fn(arg) for _ in range(500) for arg in (sentinel.slow, sentinel.fast)])
+
+    assert results == [sentinel.slow, sentinel.fast] * 500
+    assert clock.time() == 3
+
+
+
+def test_virtual_clock_advances_after_a_loop_is_closed_with_sleeping_tasks():
+    from mockextras import Latency, VirtualClock
+    clock = VirtualClock()
+    mock_fn = AsyncMock()
+    when(mock_fn).called_with(sentinel.slow).then(sentinel.slow, latency=Latency(5, clock=clock))
+    when(mock_fn).called_with(sentinel.fast).then(sentinel.fast, latency=Latency(1, clock=clock))
+
+    loop = asyncio.new_event_loop()
+    try:
+        tasks = [loop.create_task(mock_fn(sentinel.slow)) for _ in range(3)]
+        # the tasks start sleeping, then the loop is closed before the clock wakes them all, e.g. on a timeout
+        loop.run_until_complete(asyncio.sleep(0))
+        assert not all(task.done() for task in tasks)
+    finally:
+        loop.close()
+
+    assert _run(mock_fn(sentinel.fast)) == sentinel.fast
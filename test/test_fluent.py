@@ -259,3 +259,43 @@ def test_most_general_last():
 def test_called_with_object_has_empty_string_representation():
     mock_fn = MagicMock()
     assert repr(when(mock_fn).called_with(sentinel.arg)) == ""
+
+
+def test_when_large_configuration_added_at_runtime():
+    mock_fn = Mock()
+    for i in range(100):
+        when(mock_fn).called_with(i).then(i * 2)
+    assert mock_fn(99) == 198
+
+    when(mock_fn).called_with(Any(str)).then(sentinel.string)
+    when(mock_fn).called_with(100).then(sentinel.hundred)
+
+    assert mock_fn(100) == sentinel.hundred
+    assert mock_fn("hello") == sentinel.string
+    assert mock_fn(0) == 0
+
+
+def test_fluent_builders_are_shared_and_slot_based():
+    mock_fn1, mock_fn2 = Mock(), Mock()
+    when1, when2 = when(mock_fn1), when(mock_fn2)
+    called_with = when1.called_with(sentinel.arg).then(sentinel.result)
+
+    assert type(when1) is type(when2)
+    assert type(called_with) is type(when2.called_with(sentinel.arg))
+    assert not hasattr(when1, '__dict__')
+    assert not hasattr(called_with, '__dict__')
+    assert not hasattr(mock_fn1.side_effect._results[0][1], '__dict__')
+
+
+def test_when_call_then_long_sequence():
+    mock_fn = Mock()
+    called_with = when(mock_fn).called_with(sentinel.arg)
+    for i in range(20000):
+        called_with.then(i)
+    called_with.then(TestException(sentinel.exception)).then(sentinel.last)
+
+    assert [mock_fn(sentinel.arg) for _ in range(20000)] == list(range(20000))
+    with pytest.raises(TestException):
+        mock_fn(sentinel.arg)
+    assert mock_fn(sentinel.arg) == sentinel.last
+    assert mock_fn(sentinel.arg) == sentinel.last
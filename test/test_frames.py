@@ -0,0 +1,119 @@
+from mockextras import stub, FrameEqual, SeriesEqual, Any
+from mockextras import _frames
+try:
+    from unittest.mock import call, patch
+except ImportError:
+    from mock import call, patch
+import copy
+import pickle
+import sys
+import pytest
+
+
+def test_frame_matchers_require_pandas(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pandas', None)
+
+    with pytest.raises(ImportError):
+        FrameEqual(None)
+    with pytest.raises(ImportError):
+        SeriesEqual(None)
+
+
+def test_frame_equal_equality():
+    pd = pytest.importorskip('pandas')
+    expected = pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.2], 'c': ['x', 'y']})
+
+    assert FrameEqual(expected) == expected.copy()
+    assert expected.copy() == FrameEqual(expected)
+    assert FrameEqual(expected) != pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.3], 'c': ['x', 'y']})
+    assert FrameEqual(expected) != pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.2], 'c': ['x', 'z']})
+    assert FrameEqual(expected) != pd.DataFrame({'a': [1., 2.], 'b': [0.1, 0.2], 'c': ['x', 'y']})
+    assert FrameEqual(expected) != expected.set_index(pd.Index([5, 6]))
+    assert FrameEqual(expected) != expected[['a', 'b']]
+    assert FrameEqual(expected) != expected['a']
+    assert FrameEqual(expected) != "hello"
+
+
+def test_frame_equal_ignore_column_order():
+    pd = pytest.importorskip('pandas')
+    expected = pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.2]})
+    reordered = expected[['b', 'a']]
+
+    assert FrameEqual(expected) != reordered
+    assert FrameEqual(expected, ignore_column_order=True) == reordered
+    assert FrameEqual(expected, ignore_column_order=True) != reordered.assign(a=[1, 3])
+
+
+def test_frame_equal_tolerance():
+    pd = pytest.importorskip('pandas')
+    expected = pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.2]})
+
+    assert FrameEqual(expected) != pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.201]})
+    assert FrameEqual(expected, atol=0.01) == pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.201]})
+    assert FrameEqual(expected, atol=0.01) != pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.3]})
+    assert FrameEqual(expected, rtol=0.1) == pd.DataFrame({'a': [1, 2], 'b': [0.105, 0.19]})
+    assert FrameEqual(expected, atol=10) != pd.DataFrame({'a': [1, 3], 'b': [0.1, 0.2]})
+
+
+def test_frame_equal_unhashable_and_duplicate_columns():
+    pd = pytest.importorskip('pandas')
+    expected = pd.DataFrame({'a': [[1], [2]]})
+    assert FrameEqual(expected) == pd.DataFrame({'a': [[1], [2]]})
+    assert FrameEqual(expected) != pd.DataFrame({'a': [[1], [3]]})
+
+    duplicated = pd.DataFrame([[1, 2]], columns=['a', 'a'])
+    assert FrameEqual(duplicated) == duplicated.copy()
+    assert FrameEqual(duplicated) != pd.DataFrame([[1, 3]], columns=['a', 'a'])
+
+
+def test_series_equal_equality():
+    pd = pytest.importorskip('pandas')
+    expected = pd.Series([0.1, 0.2], name='x')
+
+    assert SeriesEqual(expected) == expected.copy()
+    assert expected.copy() == SeriesEqual(expected)
+    assert SeriesEqual(expected) != pd.Series([0.1, 0.2], name='y')
+    assert SeriesEqual(expected) != pd.Series([0.1, 0.21], name='x')
+    assert SeriesEqual(expected) != pd.Series([0.1, 0.2], name='x', index=[1, 2])
+    assert SeriesEqual(expected, atol=0.1) == pd.Series([0.1, 0.21], name='x')
+    assert SeriesEqual(expected) != expected.to_frame()
+
+
+def test_frame_hashes_cached_during_lookup():
+    pd = pytest.importorskip('pandas')
+    frames = [pd.DataFrame({'a': list(range(i, i + 10))}) for i in range(20)]
+    fn = stub(*[(call(FrameEqual(frame)), i) for i, frame in enumerate(frames)])
+
+    with patch.object(_frames, '_content_hash', wraps=_frames._content_hash) as mock_hash:
+        assert fn(frames[19].copy()) == 19
+    # the index and the single column of the argument, once each
+    assert mock_hash.call_count == 2
+
+
+def test_frame_matchers_in_stub():
+    pd = pytest.importorskip('pandas')
+    expected = pd.DataFrame({'a': [1, 2]})
+    fn = stub((call(FrameEqual(expected)), 'frame'),
+              (call(SeriesEqual(expected['a'])), 'series'),
+              (call(Any()), 'other'))
+
+    assert fn(expected.copy()) == 'frame'
+    assert fn(expected['a'].copy()) == 'series'
+    assert fn(expected + 1) == 'other'
+
+
+def test_pretty_print_frame_matchers():
+    pd = pytest.importorskip('pandas')
+
+    assert repr(FrameEqual(pd.DataFrame({'a': [1, 2]}))) == "FrameEqual(<DataFrame of shape (2, 1)>)"
+    assert repr(SeriesEqual(pd.Series([1, 2]))) == "SeriesEqual(<Series of shape (2,)>)"
+
+
+def test_frame_matchers_can_be_pickled_and_copied():
+    pd = pytest.importorskip('pandas')
+    expected = pd.DataFrame({'a': [1, 2], 'b': [0.1, 0.2]})
+
+    for matcher, other in ((FrameEqual(expected), expected + 1), (SeriesEqual(expected['b']), expected['b'] + 1)):
+        for copied in (pickle.loads(pickle.dumps(matcher)), copy.deepcopy(matcher)):
+            assert copied == matcher._expected.copy()
+            assert copied != other
@@ -0,0 +1,49 @@
+import mockextras
+import pytest
+import subprocess
+import sys
+
+
+_MODULES = ['_stub', '_fluent', '_matchers', '_arrays', '_frames', '_latency', '_record', '_precompiled', '_seqfile',
+            '_stats']
+if sys.version_info >= (3, 5):
+    _MODULES.append('_async')
+
+
+def _run(statement):
+    return subprocess.check_output([sys.executable, '-c', statement]).decode('utf-8').strip()
+
+
+def test_exports_match_the_modules():
+    exported = set()
+    for name in _MODULES:
+        module = __import__('mockextras.' + name, fromlist=['__all__'])
+        exported.update(module.__all__)
+
+    assert set(mockextras.__all__) == exported
+
+
+def test_all_names_can_be_imported():
+    for name in mockextras.__all__:
+        assert getattr(mockextras, name) is not None
+
+
+def test_unknown_name():
+    with pytest.raises(AttributeError):
+        mockextras.DoesNotExist  #pylint: disable=pointless-statement,no-member
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='needs module __getattr__')
+def test_import_is_lazy():
+    modules = _run("import mockextras, sys; print(sorted(m for m in sys.modules "
+                   "if m.startswith('mockextras.') or m in ('unittest.mock', 'mock')))")
+
+    assert modules == '[]'
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='needs module __getattr__')
+def test_first_use_imports_only_what_is_needed():
+    modules = _run("import mockextras, sys; mockextras.Any; print(sorted(m for m in sys.modules "
+                   "if m.startswith('mockextras.')))")
+
+    assert modules == "['mockextras._matchers', 'mockextras._scope']"
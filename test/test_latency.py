@@ -0,0 +1,128 @@
+from mockextras import stub, when, seq, delayed, Latency, LatencyStats, VirtualClock
+try:
+    from unittest.mock import Mock, call, sentinel
+except ImportError:
+    from mock import Mock, call, sentinel
+import pytest
+
+
+def test_virtual_clock_sleep():
+    clock = VirtualClock(10.0)
+    clock.sleep(1.5)
+    clock.sleep(-1)
+
+    assert clock.time() == 11.5
+
+
+def test_fixed_latency_is_charged_to_the_clock():
+    clock = VirtualClock()
+    fn = stub((call(1), delayed(Latency(0.25, clock=clock), 'one')),
+              (call(2), 'two'))
+
+    assert fn(1) == 'one'
+    assert fn(2) == 'two'
+    assert fn(1) == 'one'
+    assert clock.time() == 0.5
+
+
+def test_latency_in_seconds():
+    fn = stub((call(1), delayed(0, 'one')))
+
+    assert fn(1) == 'one'
+
+
+def test_delayed_sequence():
+    clock = VirtualClock()
+    fn = stub((call(1), delayed(Latency(1, clock=clock), 'a', ValueError('b'), 'c')),
+              (call(2), delayed(Latency(1, clock=clock), seq(range(3)))))
+
+    assert fn(1) == 'a'
+    with pytest.raises(ValueError):
+        fn(1)
+    assert fn(1) == 'c'
+    assert [fn(2), fn(2)] == [0, 1]
+    assert clock.time() == 5
+
+
+def test_latency_distribution():
+    clock = VirtualClock()
+    fn = stub((call(1), delayed(Latency(p50=0.02, p99=0.5, clock=clock, seed=1), 'one')))
+
+    for _ in range(10000):
+        fn(1)
+
+    [(key, stats)] = fn.latency_stats()
+    assert key == call(1)
+    assert stats.count == 10000
+    assert stats.timeouts == 0
+    assert 0.018 < stats.p50 < 0.022
+    assert 0.4 < stats.p99 < 0.6
+    assert stats.total == pytest.approx(clock.time())
+
+
+def test_timeouts():
+    clock = VirtualClock()
+    latency = Latency(p50=0.01, p99=0.1, timeout=1.0, timeout_rate=0.1, clock=clock, seed=2)
+    fn = stub((call(1), delayed(latency, 'one')))
+
+    timeouts = 0
+    for _ in range(1000):
+        try:
+            fn(1)
+        except Exception as err:  #pylint: disable=broad-except
+            assert 'Simulated timeout after 1s' in str(err)
+            timeouts += 1
+
+    stats = fn.latency_stats()[0][1]
+    assert stats.timeouts == timeouts
+    assert 50 < timeouts < 150
+    assert stats.max == 1.0
+
+
+def test_custom_timeout_error():
+    fn = stub((call(1), delayed(Latency(0, timeout=0, error=KeyError, clock=VirtualClock()), 'one')))
+
+    with pytest.raises(KeyError):
+        fn(1)
+
+
+def test_invalid_latency():
+    with pytest.raises(ValueError):
+        Latency(p50=1, p99=0.5)
+    with pytest.raises(ValueError):
+        Latency(p50=1, timeout_rate=0.1)
+
+
+def test_when_then_with_latency():
+    clock = VirtualClock()
+    mock_fn = Mock()
+    when(mock_fn).called_with(sentinel.arg).then(sentinel.first, latency=Latency(2, clock=clock))\
+                                           .then(sentinel.second)
+
+    assert mock_fn(sentinel.arg) == sentinel.first
+    assert mock_fn(sentinel.arg) == sentinel.second
+    assert clock.time() == 4
+    assert mock_fn.side_effect.latency_stats()[0][1].count == 2
+
+
+def test_latency_must_be_given_to_first_then():
+    mock_fn = Mock()
+    called_with = when(mock_fn).called_with(sentinel.arg).then(sentinel.first)
+
+    with pytest.raises(RuntimeError):
+        called_with.then(sentinel.second, latency=1)
+
+
+def test_latency_stats_percentiles():
+    stats = LatencyStats()
+    assert stats.p50 is None
+    for seconds in range(1, 101):
+        stats.record(seconds, seconds == 100)
+
+    assert stats.count == 100
+    assert stats.timeouts == 1
+    assert stats.p50 == 50
+    assert stats.p99 == 99
+    assert stats.percentile(0) == 1
+    assert stats.max == 100
+    assert stats.mean == 50.5
@@ -1,5 +1,14 @@
-from mockextras import Any, Contains, AnyOf
+from mockextras import Any, Contains, ContainsAnyOf, Matches, AnyOf, SameContentAs, AllOf, Or, Not
+from mockextras import stub
+try:
+    from unittest.mock import call, patch
+except ImportError:
+    from mock import call, patch
+from mockextras import _matchers
+import copy
+import re
 import functools
+import pickle
 import pytest
 
 
@@ -165,3 +174,365 @@ def test_pretty_print_any_of():
     b = AnyOf(10, 20, 30)
     assert repr(b) == "AnyOf(10, 20, 30)"
     assert str(b) == "AnyOf(10, 20, 30)"
+
+
+def test_all_of_equality():
+    assert AllOf() == "hello"
+    assert AllOf(Any(str), Contains('ell')) == "hello"
+    assert AllOf(Any(str), Contains('ell')) != "world"
+    assert AllOf(Any(str), Contains('ell')) != ["ell"]
+    assert "hello" == AllOf(Any(str), Contains('ell'))
+    assert "world" != AllOf(Any(str), Contains('ell'))
+    assert AllOf(Any(int), AnyOf(1, 2), 2) == 2
+    assert AllOf(Any(int), AnyOf(1, 2), 2) != 1
+
+
+def test_or_equality():
+    assert Or() != "hello"
+    assert Or(Any(int), Any(float), '') == 1
+    assert Or(Any(int), Any(float), '') == 1.5
+    assert Or(Any(int), Any(float), '') == ''
+    assert Or(Any(int), Any(float), '') != 'hello'
+    assert 'hello' != Or(Any(int), Any(float), '')
+
+
+def test_not_equality():
+    assert Not(Any(str)) == 100
+    assert Not(Any(str)) != "hello"
+    assert Not(None) == 0
+    assert Not(None) != None
+    assert "hello" != Not(Any(str))
+
+
+def test_combinator_operators():
+    assert (Any(str) & Contains('a')) == "abc"
+    assert (Any(str) & Contains('a')) != "xyz"
+    assert (Any(int) | Contains('a')) == "abc"
+    assert (Any(int) | Contains('a')) == 1
+    assert (~Any(int)) == "abc"
+    assert (1 | Any(str)) == 1
+    assert (Any(int) & 1) != 2
+
+
+def test_combinators_are_flattened():
+    a, b, c = Any(int), Any(float), Contains(1)
+    assert (a & b & c)._matchers == (a, b, c)
+    assert (a | b | c)._matchers == (a, b, c)
+    assert AllOf(a, AllOf(b, c))._matchers == (a, b, c)
+
+
+def test_all_of_checks_types_before_predicates():
+    calls = []
+
+    def predicate(x):
+        calls.append(x)
+        return len(x) > 2
+
+    matcher = Any().such_that(predicate) & Any(str)
+    assert matcher != 100
+    assert matcher == "abc"
+    assert calls == ["abc"]
+
+
+def test_combinators_short_circuit():
+    def boom(x):
+        raise AssertionError("should not be called")
+
+    assert (Any(int) | Any().such_that(boom)) == 1
+    assert (Any(int) & Any().such_that(boom)) != "a"
+
+
+def test_deeply_composed_matcher():
+    matcher = Any(int)
+    for i in range(100):
+        matcher = matcher & ~AnyOf(i * 2)
+    assert matcher == 1
+    assert matcher != 10
+    assert matcher == 1000
+
+
+def test_deeply_nested_matcher():
+    matcher = Any(int)
+    for _ in range(251):
+        matcher = ~matcher
+    assert matcher == 'a'
+    assert matcher != 1
+
+    matcher = Any(int)
+    for _ in range(150):
+        matcher = (matcher | Any(str)) & Any().such_that(lambda o: True)
+    assert matcher == 1
+    assert matcher == 'a'
+    assert matcher != 1.5
+
+
+def test_used_combinators_can_be_pickled_and_copied():
+    matcher = (Any(int) | Contains('a')) & ~Any(bool)
+    assert matcher == 1
+
+    for copied in (pickle.loads(pickle.dumps(matcher)), copy.deepcopy(matcher)):
+        assert repr(copied) == repr(matcher)
+        assert copied == 1
+        assert copied == 'abc'
+        assert copied != True
+        assert copied != 'b'
+
+
+def test_pretty_print_combinators():
+    assert repr(AllOf(Contains('a'), 1)) == "AllOf(Contains('a'), 1)"
+    assert repr(Contains('a') | 1) == "Or(Contains('a'), 1)"
+    assert repr(~Contains('a')) == "Not(Contains('a'))"
+
+
+def test_matchers_have_no_instance_dict():
+    for matcher in (Any(), Any(str).such_that(bool), Contains(1), AnyOf(1), AllOf(1), Or(1), Not(1)):
+        assert not hasattr(matcher, '__dict__')
+
+
+def test_any_such_that_shares_parent_predicates():
+    def first(x):
+        return True
+
+    def second(x):
+        return True
+
+    a = Any(str).such_that(first)
+    b = a.such_that(second)
+
+    assert b._chain[0] is a._chain
+    assert b._predicates == (first, second)
+    assert a._predicates == (first,)
+
+
+def test_any_with_abc():
+    try:
+        from collections.abc import Sequence
+    except ImportError:
+        from collections import Sequence
+
+    class MySequence(object):
+        def __len__(self):
+            return 0
+
+        def __getitem__(self, index):
+            raise IndexError(index)
+
+    assert Any(Sequence) == [1, 2]
+    assert Any(Sequence) == "hello"
+    assert Any(Sequence) != 100
+    assert Any(Sequence) != MySequence()
+
+    Sequence.register(MySequence)
+    assert Any(Sequence) == MySequence()
+    assert (Any(Sequence) & Any(object)) == MySequence()
+
+
+def test_any_with_runtime_checkable_protocol():
+    typing = pytest.importorskip('typing')
+    if not hasattr(typing, 'runtime_checkable'):
+        pytest.skip('runtime checkable protocols need python 3.8')
+
+    @typing.runtime_checkable
+    class HasX(typing.Protocol):
+        x = None
+
+    class Point(object):
+        pass
+
+    with_x, without_x = Point(), Point()
+    with_x.x = 1
+
+    assert Any(HasX) == with_x
+    assert Any(HasX) != without_x
+
+
+def test_any_of_unhashable_equality():
+    matcher = AnyOf(1, [1], {'a': 1}, {2, 3})
+
+    assert matcher == 1
+    assert matcher == [1]
+    assert matcher == {'a': 1}
+    assert matcher == {2, 3}
+    assert matcher == frozenset([2, 3])
+    assert matcher != [2]
+    assert matcher != {'a': 2}
+    assert [1] == matcher
+    assert [2] != matcher
+    assert AnyOf(1, 2) != [1]
+
+
+def test_any_of_from_pool():
+    from array import array
+
+    pool = frozenset(range(100000))
+    matcher = AnyOf.from_pool(pool)
+    assert matcher._hashed is pool
+    assert matcher == 99999
+    assert matcher != 100000
+    assert matcher != [1]
+
+    pool = array('l', range(100))
+    matcher = AnyOf.from_pool(pool)
+    assert matcher._linear is pool
+    assert matcher == 42
+    assert matcher != 100
+
+    assert AnyOf.from_pool(range(10)) == 5
+    assert AnyOf.from_pool({'a': 1}) == 'a'
+
+
+def test_pretty_print_any_of_unhashable_and_pools():
+    assert repr(AnyOf(1, [2])) == "AnyOf(1, [2])"
+    assert repr(AnyOf.from_pool(frozenset(range(10)))) == "AnyOf.from_pool(<frozenset of 10 candidates>)"
+
+
+def test_contains_any_of_equality():
+    matcher = ContainsAnyOf('he', 'she', 'his', 'hers')
+
+    assert matcher == "ushers"
+    assert matcher == "this"
+    assert matcher != "hi there"[:2]
+    assert matcher != "xyz"
+    assert "ushers" == matcher
+    assert "xyz" != matcher
+
+    assert ContainsAnyOf(b'ab', b'bc') == b'xxbc'
+    assert ContainsAnyOf(b'ab', b'bc') != b'acb'
+    assert ContainsAnyOf(3, 4) == range(4)
+    assert ContainsAnyOf(3, 4) != [1, 2]
+    assert ContainsAnyOf('') == "anything"
+    assert ContainsAnyOf() != "anything"
+
+
+def test_contains_any_of_find():
+    matcher = ContainsAnyOf('he', 'she', 'his', 'hers')
+
+    assert matcher.find("ushers") == 'she'
+    assert matcher.find("ahishers") == 'his'
+    assert matcher.find("xyz") is None
+    assert ContainsAnyOf('a', 'b').find(['x', 'b']) == 'b'
+
+
+def test_contains_any_of_many_patterns():
+    patterns = ['pattern%05d;' % i for i in range(5000)]
+    matcher = ContainsAnyOf(*patterns)
+
+    assert matcher.find("some text pattern04999; more") == 'pattern04999;'
+    assert matcher != "some text pattern05000; more"
+
+
+def test_pretty_print_contains_any_of():
+    assert repr(ContainsAnyOf('a', 1)) == "ContainsAnyOf('a', 1)"
+
+
+def test_matches_equality():
+    assert Matches(r'[0-9]+') == 'route 66'
+    assert Matches(r'[0-9]+') != 'route sixty six'
+    assert 'route 66' == Matches(r'[0-9]+')
+    assert 'route sixty six' != Matches(r'[0-9]+')
+    assert Matches(r'hello', re.IGNORECASE) == 'HELLO WORLD'
+    assert Matches(r'hello') != 'HELLO WORLD'
+
+
+def test_matches_fullmatch():
+    assert Matches(r'[a-z]+', fullmatch=True) == 'hello'
+    assert Matches(r'[a-z]+', fullmatch=True) != 'hello world'
+    assert Matches(r'a|ab', fullmatch=True) == 'ab'
+
+
+def test_matches_bytes():
+    assert Matches(b'^GET ') == b'GET /index.html'
+    assert Matches(b'^GET ') != b'POST /index.html'
+    assert Matches(b'^GET ') != 'GET /index.html'
+    assert Matches('^GET ') != b'GET /index.html'
+
+
+def test_matches_non_strings():
+    assert Matches(r'1') != 1
+    assert Matches(r'1') != ['1']
+    assert Matches(r'1') != None
+
+
+def test_matches_shares_compiled_patterns():
+    a = Matches(r'shared[0-9]')
+    b = Matches(r'shared[0-9]')
+    assert a._match == b._match
+    assert (str, r'shared[0-9]', 0) in _matchers._compiled_patterns
+
+
+def test_matches_compiled_patterns_are_bounded(monkeypatch):
+    monkeypatch.setattr(_matchers, '_MAX_COMPILED_PATTERNS', 10)
+    for i in range(20):
+        assert Matches(r'bounded%d' % i) == 'bounded%d' % i
+    assert len(_matchers._compiled_patterns) <= 10
+    assert (str, r'bounded19', 0) in _matchers._compiled_patterns
+
+
+def test_pretty_print_matches():
+    assert repr(Matches('a.*b')) == "Matches('a.*b')"
+    assert repr(Matches('a', re.I, fullmatch=True)) == "Matches('a', flags=%r, fullmatch=True)" % re.I
+
+
+def test_same_content_as_equality():
+    payload = {'records': [{'id': 1, 'tags': ['a', 'b']}, {'id': 2, 'tags': set()}], 'blob': b'...', 'n': None}
+
+    assert SameContentAs(payload) == {'n': None, 'blob': b'...',
+                                      'records': [{'tags': ['a', 'b'], 'id': 1}, {'id': 2, 'tags': set()}]}
+    assert SameContentAs(payload) != {'n': None, 'blob': b'...', 'records': []}
+    assert SameContentAs(payload) != dict(payload, n=0)
+    assert SameContentAs(payload) != "hello"
+    assert payload == SameContentAs(payload)
+
+    assert SameContentAs([1, 2.5, True]) == [1.0, 2.5, 1]
+    assert SameContentAs(b'abc') == bytearray(b'abc')
+    assert SameContentAs(b'abc') != 'abc'
+    assert SameContentAs((1, 2)) != [1, 2]
+    assert SameContentAs({1, 2}) == frozenset([2, 1])
+    assert SameContentAs({'a': 1}) != {'a': 1, 'b': 2}
+
+
+def test_same_content_as_numbers_with_colliding_hashes():
+    from decimal import Decimal
+    from fractions import Fraction
+
+    assert SameContentAs(-1) != -2
+    assert SameContentAs([0]) != [2 ** 61 - 1]
+    assert SameContentAs(float('inf')) != 314159
+    assert SameContentAs(0.5) != Decimal('0.1')
+
+    assert SameContentAs([1, 0.5, float('inf'), 2 + 0j]) == [Decimal(1), Fraction(1, 2), Decimal('Infinity'), 2]
+    assert SameContentAs(1 + 2j) == complex(1.0, 2.0)
+    assert SameContentAs(1 + 2j) != complex(1.0, 3.0)
+    nan = float('nan')
+    assert SameContentAs([nan]) != [float('nan')]
+
+
+def test_same_content_as_falls_back_to_equality():
+    class Point(object):
+        def __init__(self, x):
+            self.x = x
+
+        def __eq__(self, other):
+            return self.x == other.x
+
+    assert SameContentAs([Point(1)]) == [Point(1)]
+    assert SameContentAs([Point(1)]) != [Point(2)]
+
+    recursive = []
+    recursive.append(recursive)
+    assert SameContentAs([1, 2]) != recursive
+
+
+def test_same_content_as_fingerprints_argument_once_per_lookup():
+    payload = [{'id': i, 'data': 'x' * 100} for i in range(100)]
+    fn = stub(*[(call(SameContentAs(payload[:i])), i) for i in range(20)] +
+               [(call(SameContentAs(payload)), 'all')])
+
+    with patch("mockextras._matchers._fingerprint", wraps=_matchers._fingerprint) as mock_fingerprint:
+        assert fn(list(payload)) == 'all'
+    assert mock_fingerprint.call_count == 1
+
+
+def test_pretty_print_same_content_as():
+    assert repr(SameContentAs([1, 2])) == "SameContentAs([1, 2])"
+    assert repr(SameContentAs('x' * 100)) == "SameContentAs('%s...)" % ('x' * 76)
@@ -0,0 +1,147 @@
+from mockextras import stub, when, precompiled, Any, UnexpectedStubCall
+try:
+    from unittest.mock import Mock, call
+except ImportError:
+    from mock import Mock, call
+import os
+import re
+import pytest
+
+
+def _cached_files(tmpdir):
+    return [name for name in os.listdir(str(tmpdir)) if name.endswith('.pickle')]
+
+
+def test_precompiled_stub_is_built_once(tmpdir):
+    builds = []
+
+    @precompiled(directory=str(tmpdir))
+    def build():
+        builds.append(1)
+        return stub(*([(call(i, name=str(i)), i) for i in range(100)] +
+                      [(call(Any(int), name=Any(str)), 'any'),
+                       (call('seq'), 1, 2, KeyError('boom'))]))
+
+    for _ in range(2):
+        fn = build()
+        assert fn(5, name='5') == 5
+        assert fn(5, name='x') == 'any'
+        assert [fn('seq'), fn('seq')] == [1, 2]
+        with pytest.raises(KeyError):
+            fn('seq')
+        with pytest.raises(UnexpectedStubCall):
+            fn('missing')
+
+    assert len(builds) == 1
+    assert len(_cached_files(tmpdir)) == 1
+    # the <locals> of the name of a nested function aren't allowed in file names on Windows
+    assert re.match(r'^[A-Za-z0-9_.-]+$', _cached_files(tmpdir)[0])
+
+
+# a global, the values of the variables a nested function uses are part of the key of its stub
+_builds = []
+
+
+def test_precompiled_stub_is_loaded_by_a_new_session(tmpdir):
+    del _builds[:]
+
+    def build():
+        _builds.append(1)
+        return stub((call(1), 'one'))
+
+    assert precompiled(directory=str(tmpdir))(build)()(1) == 'one'
+    # as if decorated again by a new test session
+    assert precompiled(directory=str(tmpdir))(build)()(1) == 'one'
+    assert len(_builds) == 1
+
+
+def test_precompiled_stub_follows_its_closure(tmpdir):
+    def make(n):
+        @precompiled(directory=str(tmpdir))
+        def build():
+            return stub((call(1), n))
+        return build
+
+    assert make(1)()(1) == 1
+    assert make(2)()(1) == 2
+    assert make(1)()(1) == 1
+
+
+def test_precompiled_stub_without_source_file_is_built_every_time(tmpdir):
+    namespace = {'stub': stub, 'call': call, 'builds': []}
+    exec("def build():\n    builds.append(1)\n    return stub((call(1), 'one'))", namespace)
+    build = precompiled(directory=str(tmpdir))(namespace['build'])
+
+    assert build()(1) == 'one'
+    assert build()(1) == 'one'
+    assert len(namespace['builds']) == 2
+    assert _cached_files(tmpdir) == []
+
+
+def test_precompiled_stub_follows_its_dependencies(tmpdir):
+    data = tmpdir.join('data.txt')
+    data.write('1')
+
+    @precompiled(directory=str(tmpdir), depends=[str(data)])
+    def build():
+        return stub((call(), int(data.read())))
+
+    assert build()() == 1
+    data.write('2')
+
+    @precompiled(directory=str(tmpdir), depends=[str(data)])
+    def build():  #pylint: disable=function-redefined
+        return stub((call(), int(data.read())))
+
+    assert build()() == 2
+    # the stub built from the old data is removed
+    assert len(_cached_files(tmpdir)) == 1
+
+
+def test_precompiled_fluent_stub(tmpdir):
+    @precompiled(directory=str(tmpdir))
+    def build():
+        mock_fn = Mock()
+        when(mock_fn).called_with('a').then(1).then(2)
+        return mock_fn.side_effect
+
+    mock_fn = Mock(side_effect=build())
+    assert [mock_fn('a'), mock_fn('a'), mock_fn('a')] == [1, 2, 2]
+    # each call gets a fresh stub
+    assert build()('a') == 1
+
+
+def test_precompiled_thread_safe_stub(tmpdir):
+    @precompiled(directory=str(tmpdir))
+    def build():
+        return stub((call(1), 1, 2), thread_safe=True, cache_size=10)
+
+    build()
+    fn = build()
+    assert fn._lock is not None  #pylint: disable=protected-access
+    assert [fn(1), fn(1)] == [1, 2]
+
+
+def test_unpicklable_stub_is_built_every_time(tmpdir):
+    builds = []
+
+    @precompiled(directory=str(tmpdir))
+    def build():
+        builds.append(1)
+        return stub((call(Any(int).such_that(lambda i: i > 0)), 'positive'))
+
+    with pytest.warns(UserWarning):
+        assert build()(1) == 'positive'
+    with pytest.warns(UserWarning):
+        assert build()(1) == 'positive'
+    assert len(builds) == 2
+    assert _cached_files(tmpdir) == []
+
+
+def test_precompiled_must_return_a_stub(tmpdir):
+    @precompiled(directory=str(tmpdir))
+    def build():
+        return Mock()
+
+    with pytest.raises(TypeError):
+        build()
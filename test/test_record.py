@@ -0,0 +1,159 @@
+from mockextras import record, replay, UnexpectedStubCall
+try:
+    from unittest.mock import Mock, call
+except ImportError:
+    from mock import Mock, call
+import pytest
+
+
+class _Client(object):
+    def __init__(self):
+        self.calls = 0
+        self.prices = _Prices()
+
+    def get(self, key, default=None):
+        self.calls += 1
+        if key == 'missing':
+            raise KeyError(key)
+        return '%s-%d' % (key, self.calls) if default is None else default
+
+
+class _Prices(object):
+    version = 3
+
+    def latest(self, ticker):
+        return {'ticker': ticker, 'price': 100.5}
+
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join('client.rec'))
+
+
+def test_record_and_replay_function(path):
+    with record(lambda x, y=0: x + y, path) as fn:
+        assert fn(1) == 1
+        assert fn(1, y=2) == 3
+
+    replayed = replay(path)
+
+    assert replayed(1) == 1
+    assert replayed(1, y=2) == 3
+    with pytest.raises(UnexpectedStubCall):
+        replayed(2)
+
+
+def test_record_and_replay_object(path):
+    client = _Client()
+    with record(client, path) as recorder:
+        assert recorder.get('a') == 'a-1'
+        assert recorder.get('a') == 'a-2'
+        assert recorder.get('b', default=5) == 5
+        with pytest.raises(KeyError):
+            recorder.get('missing')
+        assert recorder.prices.latest('VOD.L') == {'ticker': 'VOD.L', 'price': 100.5}
+        assert recorder.prices.version == 3
+        assert recorder.calls == 4
+
+    replayed = replay(path)
+
+    assert replayed.get('a') == 'a-1'
+    assert replayed.get('a') == 'a-2'
+    # the last result recorded for a call is repeated
+    assert replayed.get('a') == 'a-2'
+    assert replayed.get('b', default=5) == 5
+    with pytest.raises(KeyError):
+        replayed.get('missing')
+    assert replayed.prices.latest('VOD.L') == {'ticker': 'VOD.L', 'price': 100.5}
+
+
+class _Batcher(object):
+    def batch(self, size):
+        return list(range(size))
+
+
+def test_replay_methods_named_like_stub_attributes(path):
+    with record(_Batcher(), path) as recorder:
+        assert recorder.batch(3) == [0, 1, 2]
+    with record(_Client(), path) as recorder:
+        recorder.prices.latest('VOD.L')
+
+    replayed = replay(path)
+
+    assert replayed.method('batch')(3) == [0, 1, 2]
+    assert replayed.method('batch') is replayed.method('batch')
+    assert replayed.method('prices.latest')('VOD.L') == {'ticker': 'VOD.L', 'price': 100.5}
+    assert replayed.method('prices.latest') is replayed.prices.latest
+
+
+def test_replay_as_side_effect(path):
+    with record(_Client(), path) as recorder:
+        recorder.get('a')
+
+    client = Mock()
+    client.get.side_effect = replay(path).get
+
+    assert client.get('a') == 'a-1'
+    client.get.assert_called_once_with('a')
+
+
+def test_replay_falls_back_to_equality(path):
+    with record(lambda d: sorted(d.items()), path) as fn:
+        fn({'a': 1, 'b': 2})
+
+    replayed = replay(path)
+
+    # equal to the recorded argument but pickles differently
+    assert replayed({'b': 2, 'a': 1.0}) == [('a', 1), ('b', 2)]
+
+
+def test_recording_is_appended(path):
+    with record(lambda x: x * 2, path) as fn:
+        fn(1)
+    with record(lambda x: x * 3, path) as fn:
+        fn(1)
+        fn(2)
+
+    replayed = replay(path)
+
+    assert [replayed(1), replayed(1), replayed(2)] == [2, 3, 6]
+
+
+def test_replay_ignores_partly_written_record(path):
+    with record(lambda x: x, path) as fn:
+        fn(1)
+        fn(2)
+    with open(path, 'rb+') as f:
+        f.seek(-3, 2)
+        f.truncate()
+
+    replayed = replay(path)
+
+    assert replayed(1) == 1
+    with pytest.raises(UnexpectedStubCall):
+        replayed(2)
+
+
+def test_replay_is_indexed_on_first_call(path, tmpdir):
+    replayed = replay(str(tmpdir.join('missing.rec')))
+
+    with pytest.raises(IOError):
+        replayed(1)
+
+
+def test_replay_rejects_other_files(path):
+    with open(path, 'wb') as f:
+        f.write(b'not a recording\n')
+
+    with pytest.raises(ValueError):
+        replay(path)(1)
+
+
+def test_unexpected_replay_call_lists_recorded_calls(path):
+    with record(lambda x: x, path) as fn:
+        fn(1)
+
+    with pytest.raises(UnexpectedStubCall) as err:
+        replay(path)(2)
+
+    assert err.value.configured == [(call(1), err.value.configured[0][1])]
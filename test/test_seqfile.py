@@ -0,0 +1,114 @@
+from mockextras import seq_from_file, stub
+try:
+    from unittest.mock import call
+except ImportError:
+    from mock import call
+import json
+import pytest
+
+
+class _Error(Exception):
+    pass
+
+
+def _write(tmpdir, text):
+    path = tmpdir.join('results.jsonl')
+    path.write_binary(text.encode('utf-8'))
+    return str(path)
+
+
+def test_seq_from_file(tmpdir):
+    path = _write(tmpdir, '{"price": 228.5}\n[1, 2]\n\n"text"\r\n3')
+    nxt = seq_from_file(path)
+
+    assert nxt() == {'price': 228.5}
+    assert nxt() == [1, 2]
+    assert nxt() == 'text'
+    assert nxt() == 3
+    with pytest.raises(StopIteration):
+        nxt()
+    with pytest.raises(StopIteration):
+        nxt()
+
+
+def test_seq_from_empty_file(tmpdir):
+    nxt = seq_from_file(_write(tmpdir, ''))
+
+    with pytest.raises(StopIteration):
+        nxt()
+
+
+def test_seq_from_file_raises_marked_records(tmpdir):
+    path = _write(tmpdir, '\n'.join([
+        '{"$raise": "KeyError", "args": ["VOD.L"]}',
+        '{"$raise": "test_seqfile._Error"}',
+        '{"$raise": "ValueError", "args": ["boom"]}',
+        '1']))
+    fn = stub((call('VOD.L'), seq_from_file(path, exceptions=[_Error])))
+
+    with pytest.raises(KeyError) as err:
+        fn('VOD.L')
+    assert err.value.args == ('VOD.L',)
+    with pytest.raises(_Error):
+        fn('VOD.L')
+    with pytest.raises(ValueError):
+        fn('VOD.L')
+    assert fn('VOD.L') == 1
+
+
+def test_seq_from_file_without_raise_key(tmpdir):
+    nxt = seq_from_file(_write(tmpdir, '{"$raise": "KeyError"}\n'), raise_key=None)
+
+    assert nxt() == {'$raise': 'KeyError'}
+
+
+def test_seq_from_file_marked_record_must_name_an_exception(tmpdir):
+    nxt = seq_from_file(_write(tmpdir, '{"$raise": "json.loads"}\n'))
+
+    with pytest.raises(TypeError):
+        nxt()
+
+
+def test_seq_from_file_doesnt_import_what_records_name(tmpdir):
+    nxt = seq_from_file(_write(tmpdir, '{"$raise": "mockextras_missing_module.Error"}\n{"$raise": "_Error"}\n'))
+
+    # the name isn't imported, so it isn't an ImportError
+    with pytest.raises(TypeError):
+        nxt()
+    with pytest.raises(TypeError):
+        nxt()
+
+
+def test_seq_from_file_with_named_exceptions(tmpdir):
+    path = _write(tmpdir, '{"$raise": "_Error"}\n{"$raise": "Timeout", "args": [1]}\n')
+    nxt = seq_from_file(path, exceptions={'_Error': _Error, 'Timeout': RuntimeError})
+
+    with pytest.raises(_Error):
+        nxt()
+    with pytest.raises(RuntimeError):
+        nxt()
+    with pytest.raises(TypeError):
+        seq_from_file(path, exceptions={'Timeout': json.loads})
+
+
+def test_seq_from_file_with_decode(tmpdir):
+    def decode(line):
+        name, price = line.split(',')
+        return RuntimeError(name) if price == 'error' else (name, float(price))
+
+    nxt = seq_from_file(_write(tmpdir, 'VOD.L,228.5\nBARC.L,error\n'), decode=decode)
+
+    assert nxt() == ('VOD.L', 228.5)
+    with pytest.raises(RuntimeError):
+        nxt()
+
+
+def test_seq_from_large_file_is_read_lazily(tmpdir):
+    path = tmpdir.join('large.jsonl')
+    with path.open('w') as f:
+        for i in range(100000):
+            f.write(json.dumps({'i': i}) + '\n')
+    nxt = seq_from_file(str(path))
+
+    assert [nxt()['i'] for _ in range(3)] == [0, 1, 2]
+    assert nxt._position < 100
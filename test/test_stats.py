@@ -0,0 +1,151 @@
+from mockextras import stub, when, Any, collect_stats, reset_stats, stats_report, UnexpectedStubCall
+try:
+    from unittest.mock import Mock, call, sentinel
+except ImportError:
+    from mock import Mock, call, sentinel
+import pytest
+
+pytest_plugins = ['pytester']
+
+
+@pytest.fixture(autouse=True)
+def _no_collected_stats():
+    reset_stats()
+    yield
+    collect_stats(False)
+    reset_stats()
+
+
+def test_stats_are_off_by_default():
+    fn = stub((call(1), 'one'))
+    fn(1)
+
+    assert fn.call_stats() is None
+
+
+def test_entry_stats():
+    fn = stub((call(1), 'one'),
+              (call(Any(int)), 'int'),
+              (call(Any()), 'anything'),
+              stats=True)
+
+    assert fn(1) == 'one'
+    assert fn(2) == 'int'
+    assert fn(3) == 'int'
+    assert fn('x') == 'anything'
+
+    stats = fn.call_stats()
+    assert stats.calls == 4
+    assert stats.unmatched == 0
+    one, integer, anything = stats.entries()
+    assert (one.key, one.hits, one.misses) == (call(1), 1, 3)
+    assert (integer.hits, integer.misses, integer.average_depth) == (2, 1, 1.0)
+    assert (anything.hits, anything.misses, anything.average_depth) == (1, 0, 2.0)
+    assert stats.comparisons == 8
+    assert stats.seconds > 0
+    assert 'test_stats.py' in stats.label
+
+
+def test_unmatched_calls_are_counted():
+    fn = stub((call(1), 'one'), stats=True)
+
+    with pytest.raises(UnexpectedStubCall):
+        fn(2)
+
+    stats = fn.call_stats()
+    assert (stats.calls, stats.unmatched) == (1, 1)
+    assert stats.entries()[0].misses == 1
+
+
+def test_predicate_time_is_measured():
+    import time
+
+    def slow(_):
+        time.sleep(0.01)
+        return True
+
+    fn = stub((call(Any().such_that(slow)), 'slow'), stats=True)
+    fn(1)
+
+    assert fn.call_stats().entries()[0].seconds >= 0.01
+
+
+def test_cached_calls_count_as_hits():
+    fn = stub((call(1), 'one'), (call(Any(int)), 'int'), cache_size=10, stats=True)
+
+    for _ in range(3):
+        assert fn(2) == 'int'
+
+    integer = fn.call_stats().entries()[1]
+    assert integer.hits == 3
+    assert integer.misses == 0
+
+
+def test_collect_stats_for_stubs_made_by_when():
+    collect_stats()
+    mock_fn = Mock()
+    when(mock_fn).called_with(sentinel.arg).then(sentinel.result)
+    mock_fn(sentinel.arg)
+
+    stats = mock_fn.side_effect.call_stats()
+    assert stats.calls == 1
+    assert 'test_stats.py' in stats.label
+
+
+def test_stats_report():
+    collect_stats()
+    fast = stub((call(1), 'one'))
+    slow = stub((call(Any(int).such_that(lambda i: sum(range(10000)) and i > 5)), 'big'),
+                (call(Any(int)), 'small'))
+    for i in range(10):
+        fast(1)
+        slow(i)
+    unused = stub((call(1), 'one'))  #pylint: disable=unused-variable
+
+    report = stats_report()
+
+    slowest, fastest = [line for line in report.splitlines() if 'test_stats.py' in line]
+    assert str(slow.call_stats().calls) in slowest
+    assert slowest.index('test_stats.py') and report.index(slowest) < report.index(fastest)
+    assert 'Slowest matchers:' in report
+    assert 'Any(<class \'int\'>).such_that(' in report
+
+
+def test_empty_stats_report():
+    assert stats_report() == 'No stub statistics were collected'
+
+
+def test_pytest_plugin(testdir):
+    testdir.makepyfile("""
+        from mockextras import stub, Any
+        from unittest.mock import call
+
+        def test_stub():
+            fn = stub((call(Any(int)), 'int'))
+            assert fn(1) == 'int'
+    """)
+
+    result = testdir.runpytest('-p', 'mockextras.pytest_plugin', '--mockextras-stats')
+
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['*mockextras stub statistics*', '*Slowest matchers:*', "*Any(<class 'int'>)*"])
+
+
+def test_collected_stats_do_not_keep_the_results_alive():
+    import gc
+    import weakref
+
+    class Result(object):
+        pass
+
+    collect_stats()
+    result = Result()
+    alive = weakref.ref(result)
+    fn = stub((call(1), result), (call(2), 'two'))
+    assert fn(2) == 'two'
+    stats = fn.call_stats()
+    del fn, result
+    gc.collect()
+
+    assert alive() is None
+    assert [entry.key for entry in stats.entries()] == [call(1), call(2)]
@@ -1,4 +1,4 @@
-from mockextras import stub, seq, Any, UnexpectedStubCall
+from mockextras import stub, seq, when, Any, Contains, Or, UnexpectedStubCall
 from mockextras._stub import _Sequence
 try:
     from unittest.mock import Mock, sentinel, patch, call
@@ -6,6 +6,7 @@ except ImportError:
     from mock import Mock, sentinel, patch, call
 import pytest
 from datetime import datetime
+from decimal import Decimal
 
 
 def test_seq_empty_list():
@@ -236,3 +237,482 @@ def test_stub_arg_matching():
     assert mock_fn(x=sentinel.argx, y=Any()) == sentinel.res4
     assert mock_fn(x=sentinel.argx, y=Any(datetime)) == sentinel.res5
     assert mock_fn(x=sentinel.argx, y=sentinel.meh) == sentinel.res6
+
+
+def test_large_stub_exact_match():
+    fn = stub(*[(call(i, key="k%d" % i), i * 10) for i in range(1000)])
+
+    assert fn(0, key="k0") == 0
+    assert fn(500, key="k500") == 5000
+    assert fn(999, key="k999") == 9990
+    with pytest.raises(UnexpectedStubCall):
+        fn(1000, key="k1000")
+
+
+def test_large_stub_first_configured_match_wins():
+    fn = stub(*([(call(i), i) for i in range(100)] +
+                [(call(Any(int)), sentinel.any_int),
+                 (call(200), sentinel.two_hundred),
+                 (call(50), sentinel.duplicate)]))
+
+    assert fn(50) == 50
+    assert fn(200) == sentinel.any_int
+    assert fn(300) == sentinel.any_int
+    assert fn(1.0) == 1
+    assert fn(True) == 1
+
+
+def test_large_stub_unhashable_and_matcher_arguments():
+    fn = stub(*([(call(i), i) for i in range(100)] +
+                [(call([1, 2]), sentinel.list_arg),
+                 (call({'a': 1}), sentinel.dict_arg)]))
+
+    assert fn([1, 2]) == sentinel.list_arg
+    assert fn({'a': 1}) == sentinel.dict_arg
+    assert fn(Any(int)) == 0
+    assert fn(Any(dict)) == sentinel.dict_arg
+
+
+def test_large_stub_index_follows_appended_entries():
+    fn = stub(*[(call(i), i) for i in range(100)])
+    assert fn(5) == 5
+    with pytest.raises(UnexpectedStubCall):
+        fn(100)
+
+    fn._results.append((call(100), sentinel.hundred))
+    fn._results.append((call(Any()), sentinel.anything))
+
+    assert fn(100) == sentinel.hundred
+    assert fn(5) == 5
+    assert fn("hello") == sentinel.anything
+
+
+def test_large_stub_matcher_dispatch():
+    fn = stub(*([(call(i, Any(str)), (i, 'str')) for i in range(100)] +
+                [(call(i, Any(int)), (i, 'int')) for i in range(100)] +
+                [(call(Any(), Any(list)), 'list'),
+                 (call(Any(), x=Any(float)), 'float kwarg')]))
+
+    assert fn(5, "hello") == (5, 'str')
+    assert fn(5, 10) == (5, 'int')
+    assert fn(5, True) == (5, 'int')
+    assert fn("whatever", [1, 2]) == 'list'
+    assert fn(5, []) == 'list'
+    assert fn(5, x=1.5) == 'float kwarg'
+    with pytest.raises(UnexpectedStubCall):
+        fn(5, 1.5)
+    with pytest.raises(UnexpectedStubCall):
+        fn(5, x=1)
+
+
+def test_large_stub_matcher_dispatch_preserves_order():
+    class Base(object):
+        pass
+
+    class Derived(Base):
+        pass
+
+    fn = stub(*([(call(i), i) for i in range(100)] +
+                [(call(Any(Derived)), 'derived'),
+                 (call(Any(Base)), 'base'),
+                 (call(Contains('ell')), 'contains'),
+                 (call(Any(str)), 'str')]))
+
+    assert fn(Derived()) == 'derived'
+    assert fn(Base()) == 'base'
+    assert fn("hello") == 'contains'
+    assert fn("world") == 'str'
+    assert fn(Mock(spec=Derived)) == 'derived'
+
+
+def test_error_on_missed_lookup_carries_call_and_configuration():
+    test_data = stub((call(sentinel.keya), sentinel.vala), (call(sentinel.keyb), sentinel.valb))
+
+    with pytest.raises(UnexpectedStubCall) as err:
+        test_data(sentinel.keyc)
+
+    assert err.value.call == call(sentinel.keyc)
+    assert err.value.configured is test_data._results
+
+
+def test_error_on_missed_lookup_is_rendered_lazily():
+    class CountingRepr(object):
+        count = 0
+
+        def __repr__(self):
+            CountingRepr.count += 1
+            return 'CountingRepr()'
+
+    fn = stub(*[(call(i, CountingRepr()), i) for i in range(1000)])
+
+    with pytest.raises(UnexpectedStubCall) as err:
+        fn(1000, CountingRepr())
+    assert CountingRepr.count == 0
+
+    str(err.value)
+    assert CountingRepr.count == err.value.max_listed + 1
+
+
+def test_error_on_missed_lookup_lists_closest_calls():
+    fn = stub(*([(call(i, "x%d" % i), i) for i in range(100)] +
+                [(call(42, "y"), sentinel.y), (call(43, "y", z=1), sentinel.z)]))
+
+    with pytest.raises(UnexpectedStubCall) as err:
+        fn(42, "z")
+    err.value.max_listed = 3
+
+    assert str(err.value) == """Unexpected stub call:
+    call(42, 'z')
+The 3 closest of the 102 configured calls are:
+    call(42, 'x42')
+    call(42, 'y')
+    call(0, 'x0')
+"""
+
+
+def test_error_on_missed_lookup_args_hold_the_message():
+    fn = stub((call(sentinel.keya), sentinel.vala))
+
+    with pytest.raises(UnexpectedStubCall) as err:
+        fn(sentinel.keyb)
+
+    assert err.value.args == (str(err.value),)
+    assert UnexpectedStubCall('message').args == ('message',)
+
+
+def test_error_on_missed_lookup_doesnt_run_predicates_when_rendered():
+    predicate = Mock(return_value=False)
+    fn = stub((call(Any().such_that(predicate)), sentinel.val), (call(sentinel.other), sentinel.val))
+
+    with pytest.raises(UnexpectedStubCall) as err:
+        fn(sentinel.arg)
+    count = predicate.call_count
+    # so the configured calls are ranked
+    err.value.max_listed = 1
+
+    str(err.value)
+    repr(err.value)
+    assert predicate.call_count == count
+
+
+def test_error_on_missed_lookup_can_be_pickled():
+    import pickle
+    fn = stub((call(sentinel.keya), sentinel.vala))
+
+    with pytest.raises(UnexpectedStubCall) as err:
+        fn(sentinel.keyb)
+    copy = pickle.loads(pickle.dumps(err.value))
+
+    assert type(copy) is UnexpectedStubCall
+    assert str(copy) == str(err.value)
+    assert copy.args == (str(err.value),)
+
+
+def test_error_on_missed_lookup_repr():
+    fn = stub((call(sentinel.keya), sentinel.vala))
+
+    with pytest.raises(UnexpectedStubCall) as err:
+        fn(sentinel.keyb)
+
+    assert repr(err.value) == 'UnexpectedStubCall(%r)' % str(err.value)
+    assert repr(UnexpectedStubCall('message')) == repr(Exception('message')).replace('Exception', 'UnexpectedStubCall')
+
+
+def test_cache_returns_same_results():
+    fn = stub((call(100, 200), sentinel.monkey),
+              (call(100, Any()), sentinel.hello),
+              (call(200), sentinel.val1, sentinel.val2),
+              cache_size=10)
+
+    for _ in range(3):
+        assert fn(100, 200) == sentinel.monkey
+        assert fn(100, 300) == sentinel.hello
+    assert fn(200) == sentinel.val1
+    assert fn(200) == sentinel.val2
+    assert list(fn._cache.values()) == [0, 1, 2]
+
+
+def test_cache_skips_matching():
+    fn = stub((call(Any(int)), sentinel.int), cache_size=10)
+    assert fn(1) == sentinel.int
+
+    with patch.object(Any, "__eq__") as mock_eq:
+        assert fn(1) == sentinel.int
+    assert not mock_eq.called
+
+
+def test_cache_is_bounded():
+    fn = stub((call(Any()), sentinel.any), cache_size=2)
+    fn(1)
+    fn(2)
+    fn(1)
+    fn(3)
+
+    assert list(fn._cache) == [(((int, 1),), frozenset()), (((int, 3),), frozenset())]
+
+
+def test_cache_tells_apart_equal_values_of_different_types():
+    fn = stub((call(Any(float)), 'float'),
+              (call(Any(bool)), 'bool'),
+              (call(Any(int)), 'int'),
+              cache_size=10)
+
+    for _ in range(2):
+        assert fn(1) == 'int'
+        assert fn(1.0) == 'float'
+        assert fn(True) == 'bool'
+    with pytest.raises(UnexpectedStubCall):
+        fn(Decimal(1))
+    assert fn(1) == 'int'
+
+
+def test_cache_invalidated_by_new_configuration():
+    mock_fn = Mock()
+    mock_fn.side_effect = stub((call(Any()), sentinel.any), cache_size=10)
+    assert mock_fn(1) == sentinel.any
+
+    mock_fn.side_effect._results.insert(0, (call(1), sentinel.one))
+    assert mock_fn(1) == sentinel.one
+
+
+def test_cache_skips_predicates_unless_asked():
+    predicate = Mock(return_value=True)
+    fn = stub((call(Any().such_that(predicate)), sentinel.any), cache_size=10)
+    fn(1)
+    fn(1)
+    assert predicate.call_count == 2
+
+    predicate = Mock(return_value=True)
+    fn = stub((call(Any().such_that(predicate)), sentinel.any), cache_size=10, cache_predicates=True)
+    fn(1)
+    fn(1)
+    assert predicate.call_count == 1
+
+
+def test_cache_and_batch_run_custom_equality_every_time():
+    class IsEven(object):
+        """A hamcrest style matcher, which isn't a mockextras matcher."""
+        calls = 0
+
+        def __eq__(self, other):
+            IsEven.calls += 1
+            return other % 2 == 0
+
+        __hash__ = None
+
+    for is_even, arg in ((IsEven(), 2), ((IsEven(),), (2,)), (Or(IsEven(), 'two'), 2)):
+        IsEven.calls = 0
+        fn = stub((call(is_even), sentinel.match), (call(Any()), sentinel.other), cache_size=10)
+
+        assert fn(arg) == fn(arg) == sentinel.match
+        assert IsEven.calls == 2
+        assert fn.batch([(arg,), (arg,)]) == [sentinel.match] * 2
+        assert IsEven.calls == 4
+
+
+def test_adaptive_promotes_disjoint_entries():
+    fn = stub(*([(call(i, Any()), i) for i in range(100)] +
+                [(call(Any(str), Any(int)), sentinel.str_int)]),
+              adaptive=True)
+    for _ in range(20):
+        assert fn('hello', 1) == sentinel.str_int
+        assert fn(99, 'x') == 99
+    assert set(fn._hot.promoted) == set([99, 100])
+
+    assert fn('hello', 2) == sentinel.str_int
+    assert fn(3, 'x') == 3
+
+
+def test_adaptive_keeps_overlapping_entries_in_order():
+    fn = stub(*([(call(i), i) for i in range(10)] +
+                [(call(Any(int)), sentinel.int),
+                 (call(Any(str)), sentinel.str),
+                 (call(Any(float)), sentinel.float)]),
+              adaptive=True)
+    for _ in range(20):
+        assert fn(100) == sentinel.int
+        assert fn('hello') == sentinel.str
+        assert fn(2.5) == sentinel.float
+        assert fn(True) == 1
+
+    # Any(int) overlaps the literals and Any(float) the literals as 1.0 == 1, the literal 1 and Any(str) can't
+    # overlap any entry before them
+    assert set(fn._hot.promoted) == set([1, 11])
+    assert fn(1.0) == 1
+    assert fn(0.0) == 0
+
+
+def test_adaptive_promoted_entries_are_compared_first():
+    fn = stub(*([(call(Any(int), i), i) for i in range(20)] +
+                [(call(Any(str)), sentinel.str)]),
+              adaptive=True)
+    for _ in range(20):
+        fn('hello')
+
+    with patch.object(Any, "__eq__", side_effect=lambda other: isinstance(other, str)) as mock_eq:
+        assert fn('hello') == sentinel.str
+    assert mock_eq.call_count == 1
+
+
+def test_adaptive_matcher_arguments_use_configuration_order():
+    fn = stub((call(1), sentinel.one),
+              (call(2), sentinel.two),
+              adaptive=True)
+    for _ in range(20):
+        fn(2)
+    assert fn._hot.promoted == (1,)
+
+    assert fn(Any()) == sentinel.one
+
+
+def test_adaptive_follows_replaced_configuration():
+    fn = stub((call(1), sentinel.one),
+              (call(2), sentinel.two),
+              adaptive=True)
+    for _ in range(20):
+        fn(2)
+
+    fn._results = [(call(2), sentinel.first), (call(Any()), sentinel.any)]
+    assert fn(2) == sentinel.first
+
+
+def test_batch():
+    fn = stub((call(1), sentinel.one),
+              (call(2), sentinel.val1, sentinel.val2, RuntimeError(sentinel.boom), sentinel.val3),
+              (call(x=3), sentinel.x))
+
+    results = fn.batch([(1,), (2,), call(x=3), (2,), (4,), (2,), [2], (1,)])
+
+    assert results[:4] == [sentinel.one, sentinel.val1, sentinel.x, sentinel.val2]
+    assert isinstance(results[4], UnexpectedStubCall)
+    assert isinstance(results[5], RuntimeError) and str(results[5]) == str(sentinel.boom)
+    assert results[6:] == [sentinel.val3, sentinel.one]
+
+
+def test_batch_looks_up_each_distinct_call_once():
+    fn = stub((call(Any(int)), sentinel.int), (call(Any(str)), sentinel.str))
+
+    with patch.object(fn, "_position", wraps=fn._position) as mock_position:
+        assert fn.batch([(1,), ('a',), (1,), ('a',), (2,)]) == [sentinel.int, sentinel.str, sentinel.int,
+                                                               sentinel.str, sentinel.int]
+    assert mock_position.call_count == 3
+
+
+def test_batch_tells_apart_equal_values_of_different_types():
+    fn = stub((call(Any(float)), 'float'), (call(Any(bool)), 'bool'), (call(Any(int)), 'int'))
+
+    assert fn.batch([(1,), (1.0,), (True,), (1,)]) == ['int', 'float', 'bool', 'int']
+
+
+def test_batch_runs_predicates_for_every_call():
+    predicate = Mock(return_value=True)
+    fn = stub((call(Any().such_that(predicate)), sentinel.any))
+
+    assert fn.batch([(1,)] * 3) == [sentinel.any] * 3
+    assert predicate.call_count == 3
+
+    predicate = Mock(return_value=True)
+    fn = stub((call(1), sentinel.one), (call(Any().such_that(predicate)), sentinel.any))
+
+    assert fn.batch([(1,), (2,), (1,), (2,)]) == [sentinel.one, sentinel.any] * 2
+    assert predicate.call_count == 2
+
+
+def test_batch_runs_predicates_of_earlier_entries_for_every_call():
+    def configure():
+        # the entry is compared both ways round, so it first matches on the third comparison
+        predicate = Mock(side_effect=lambda x: predicate.call_count > 2)
+        return stub((call(Any().such_that(predicate)), sentinel.first), (call(Any()), sentinel.any)), predicate
+
+    fn, predicate = configure()
+    assert [fn(1) for _ in range(3)] == [sentinel.any, sentinel.first, sentinel.first]
+    fn, predicate = configure()
+    assert fn.batch([(1,)] * 3) == [sentinel.any, sentinel.first, sentinel.first]
+    assert predicate.call_count == 4
+
+
+def test_batch_columns():
+    fn = stub((call(1, 'a', flag=True), sentinel.a),
+              (call(2, 'b', flag=False), sentinel.b))
+
+    results = fn.batch_columns([1, 2, 1], ('a', 'b', 'b'), flag=[True, False, True])
+
+    assert results[:2] == [sentinel.a, sentinel.b]
+    assert isinstance(results[2], UnexpectedStubCall)
+    with pytest.raises(ValueError):
+        fn.batch_columns([1, 2], ['a'])
+
+
+def test_batch_columns_from_numpy_arrays():
+    np = pytest.importorskip('numpy')
+    fn = stub((call(1, 0.5), sentinel.a), (call(2, 1.5), sentinel.b))
+
+    assert fn.batch_columns(np.array([1, 2, 2]), np.array([0.5, 1.5, 1.5])) == [sentinel.a, sentinel.b, sentinel.b]
+
+
+def test_unexpected_stub_options():
+    with pytest.raises(TypeError):
+        stub((call(), sentinel.val), cache=10)
+
+
+def _call_concurrently(fn, threads, calls):
+    from threading import Thread
+    results = [[] for _ in range(threads)]
+
+    def worker(out):
+        for _ in range(calls):
+            out.append(fn())
+
+    workers = [Thread(target=worker, args=(out,)) for out in results]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    return [r for out in results for r in out]
+
+
+def test_thread_safe_sequence_values_are_not_lost_or_duplicated():
+    fn = stub((call(sentinel.arg), seq(i for i in range(8000))), thread_safe=True)
+
+    results = _call_concurrently(lambda: fn(sentinel.arg), threads=8, calls=1000)
+
+    assert sorted(results) == list(range(8000))
+
+
+def test_thread_safe_stub_with_index_and_cache():
+    fn = stub(*[(call(i), i) for i in range(100)], thread_safe=True, cache_size=10)
+    counter = iter(range(10 ** 6))
+
+    results = _call_concurrently(lambda: fn(next(counter) % 100), threads=8, calls=500)
+
+    assert sorted(results) == sorted(i % 100 for i in range(4000))
+
+
+def test_thread_safe_stub_with_entries_added_concurrently():
+    from threading import Thread
+    mock_fn = Mock()
+    mock_fn.side_effect = stub(*[(call(i), i) for i in range(10)], thread_safe=True)
+
+    def add_entries():
+        for i in range(10, 1000):
+            when(mock_fn).called_with(i).then(i)
+
+    writer = Thread(target=add_entries)
+    writer.start()
+    results = _call_concurrently(lambda: mock_fn(5), threads=4, calls=500)
+    writer.join()
+
+    assert results == [5] * 2000
+    assert mock_fn(999) == 999
+
+
+def test_thread_safe_then_sequence():
+    mock_fn = Mock()
+    mock_fn.side_effect = stub(thread_safe=True)
+    called_with = when(mock_fn).called_with(sentinel.arg)
+    for i in range(2000):
+        called_with.then(i)
+
+    results = _call_concurrently(lambda: mock_fn(sentinel.arg), threads=8, calls=250)
+
+    assert sorted(results) == list(range(2000))